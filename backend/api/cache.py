@@ -0,0 +1,53 @@
+from core import response_cache, routers
+from django.conf import settings
+from rest_framework.response import Response
+
+
+class ResponseCacheMixin:
+    """Cache list and retrieve data for anonymous users.
+
+    Entries are keyed by absolute URL and normalised query parameters
+    and belong to the current generations of `get_cache_scopes()`,
+    which signal receivers advance when data of a scope changes.
+    Hits and misses are counted under `cache_scope`. Misses read from
+    the primary, so a lagging replica never fills the cache.
+    """
+    cache_scope: str = None
+
+    def get_cache_scopes(self) -> tuple:
+        """Return scopes the cached data depends on."""
+        return (self.cache_scope,)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return cached data or cache data of the full response."""
+        if self.cache_scope is None or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = response_cache.get_key(
+            self.get_cache_scopes(),
+            request.build_absolute_uri(request.path),
+            response_cache.normalize_query(request.query_params),
+        )
+        cache = response_cache.get_cache()
+        data = cache.get(key)
+        if data is not None:
+            response_cache.count(self.cache_scope, "hits")
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+        response_cache.count(self.cache_scope, "misses")
+        with routers.use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Cached list."""
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Cached retrieve."""
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,76 @@
+import hashlib
+
+from core.models import Version
+from core.signals import VIEWER_SCOPE
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """Answer list and retrieve requests with 304 when data is unchanged.
+
+    ETag and Last-Modified are computed from version counters of
+    `version_scopes` and, if `viewer_dependent`, of the authenticated
+    user's own state, so validators cost a single query and no
+    serialization.
+    """
+    version_scopes: tuple = ()
+    viewer_dependent: bool = False
+
+    def get_data_scopes(self) -> tuple:
+        """Return scopes of the data shared by all users."""
+        return self.version_scopes
+
+    def get_version_scopes(self) -> tuple:
+        """Return scopes the response body depends on."""
+        user = self.request.user
+        if self.viewer_dependent and user.is_authenticated:
+            return (
+                *self.get_data_scopes(),
+                VIEWER_SCOPE.format(user_id=user.pk),
+            )
+        return self.get_data_scopes()
+
+    def get_validators(self) -> tuple:
+        """Return ETag and Last-Modified timestamp of the response."""
+        versions, last_modified = Version.objects.get_validators(
+            self.get_version_scopes()
+        )
+        user_id = self.request.user.pk if self.viewer_dependent else None
+        content = f"{user_id}:{versions}:{self.request.accepted_media_type}"
+        etag = quote_etag(hashlib.sha1(content.encode()).hexdigest())
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Return 304 if validators match or the full response."""
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+            if self.viewer_dependent and request.user.is_authenticated:
+                patch_cache_control(response, no_cache=True, private=True)
+            else:
+                patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ("Authorization",))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Conditional list."""
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Conditional retrieve."""
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
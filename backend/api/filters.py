@@ -1,19 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import (SEARCH_CONFIG, FavouriteRecipe, Recipe,
+                            ShoppingCart, Tag)
 
 User = get_user_model()
 
 
-class IngredientFilter(FilterSet):
-    """Filter for ingredient."""
-    name = filters.CharFilter(lookup_expr="startswith")
-
-    class Meta:
-        model: Ingredient = Ingredient
-        fields: tuple = ("name",)
-
-
 class RecipeFilter(FilterSet):
     """Filter for Recipe."""
     tags = filters.ModelMultipleChoiceFilter(
@@ -28,6 +22,7 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method="filter_is_in_shopping_cart"
     )
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model: Recipe = Recipe
@@ -36,21 +31,43 @@ class RecipeFilter(FilterSet):
             "author",
             "is_favorited",
             "is_in_shopping_cart",
+            "search",
         )
 
-    def __is_anonymous_or_in_db(self, queryset, name, value, related_field):
-        """Return queryset if user is anonymous or value exist."""
+    def __is_anonymous_or_in_db(self, queryset, name, value, model):
+        """Return queryset if user is anonymous or value exist.
+
+        Membership is checked in SQL with an EXISTS subquery,
+        False value excludes the user's recipes.
+        """
         if self.request.user.is_anonymous:
-            return Recipe.objects.none() if value else queryset
-        objects = getattr(self.request.user, related_field).all()
-        return queryset.filter(pk__in=[item.recipe.pk for item in objects])
+            return queryset.none() if value else queryset
+        in_db = Exists(
+            model.objects.filter(
+                user=self.request.user, recipe=OuterRef("pk")
+            )
+        )
+        return queryset.filter(in_db if value else ~in_db)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         """Boolean filter for shopping cart."""
         return self.__is_anonymous_or_in_db(
-            queryset, name, value, "shopping_cart"
+            queryset, name, value, ShoppingCart
         )
 
     def filter_is_favorited(self, queryset, name, value):
         """Boolean filter for favourite."""
-        return self.__is_anonymous_or_in_db(queryset, name, value, "favourite")
+        return self.__is_anonymous_or_in_db(
+            queryset, name, value, FavouriteRecipe
+        )
+
+    def filter_search(self, queryset, name, value):
+        """Full-text search ranked by relevance."""
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank("search_vector", query))
+            .order_by("-rank", "-pub_date")
+        )
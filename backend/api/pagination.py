@@ -1,4 +1,28 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from core import response_cache, routers
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, PageNumberPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGINATION_QUERY_PARAM: str = "pagination"
+CURSOR_MODE: str = "cursor"
+ESTIMATE_SQL: str = (
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass"
+)
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -6,3 +30,303 @@ class CustomPageNumberPagination(PageNumberPagination):
     page_size: int = 6
     page_size_query_param: str = "limit"
     max_page_size: int = 20
+
+
+def get_estimated_count(queryset) -> int:
+    """Return planner's row estimate of the queryset's table."""
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(ESTIMATE_SQL, (queryset.model._meta.db_table,))
+        row = cursor.fetchone()
+    return row[0] if row else -1
+
+
+class EstimatedPage(Page):
+    """Page which knows whether it has a following page."""
+    def __init__(self, object_list, number, paginator, following: bool):
+        """Remember if rows after the page were fetched."""
+        super().__init__(object_list, number, paginator)
+        self.following = following
+
+    def has_next(self) -> bool:
+        """Return True if a row after the page exists."""
+        return self.following
+
+
+class CountedPaginator(Paginator):
+    """Paginator which takes count and its exactness from a function.
+
+    With an estimated count pages are not checked against it, the page
+    fetches one extra row to know if a next page exists.
+    """
+    def __init__(self, object_list, per_page, get_count) -> None:
+        """Set the count function."""
+        super().__init__(object_list, per_page)
+        self.get_count = get_count
+
+    @cached_property
+    def counted(self) -> tuple:
+        """Return count and whether it is exact."""
+        return self.get_count(self.object_list)
+
+    @property
+    def count(self) -> int:
+        """Return exact or estimated count."""
+        return self.counted[0]
+
+    @property
+    def count_exact(self) -> bool:
+        """Return True if count is exact."""
+        return self.counted[1]
+
+    def validate_number(self, number) -> int:
+        """Validate page number, without upper bound if count is estimated."""
+        if self.count_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Номер страницы должен быть целым числом.")
+        if number < 1:
+            raise EmptyPage("Номер страницы меньше 1.")
+        return number
+
+    def page(self, number) -> Page:
+        """Return page, by the extra row if count is estimated."""
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("Страница не содержит результатов.")
+        return EstimatedPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+
+class CachedCountPagination(CustomPageNumberPagination):
+    """Page-number pagination with cached and estimated counts.
+
+    Counts are cached per view count scopes, path and filter query
+    parameters, so writes to the scopes invalidate them. Cached counts
+    are read from the primary, never from a lagging replica. Unfiltered
+    querysets of large tables are counted by the planner's estimate.
+    """
+    def paginate_queryset(self, queryset, request, view=None):
+        """Remember request and view to get the count key."""
+        self.request = request
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        """Return paginator counting through `get_count`."""
+        return CountedPaginator(object_list, per_page, self.get_count)
+
+    def count_queryset(self, queryset) -> tuple:
+        """Return estimated count of large tables or exact count."""
+        if not queryset.query.where:
+            estimate = get_estimated_count(queryset)
+            if estimate >= settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+                return estimate, False
+        return queryset.count(), True
+
+    def get_count(self, queryset) -> tuple:
+        """Return cached count and whether it is exact."""
+        get_count_scopes = getattr(self.view, "get_count_scopes", None)
+        if get_count_scopes is None:
+            return self.count_queryset(queryset)
+        key = response_cache.get_count_key(
+            get_count_scopes(),
+            self.request.path,
+            response_cache.normalize_query(
+                self.request.query_params,
+                exclude=(self.page_query_param, self.page_size_query_param),
+            ),
+        )
+        cache = response_cache.get_cache()
+        counted = cache.get(key)
+        if counted is None:
+            with routers.use_primary():
+                counted = self.count_queryset(queryset)
+            cache.set(
+                key, counted, settings.PAGINATION_COUNT_CACHE_TIMEOUT
+            )
+        return tuple(counted)
+
+    def get_paginated_response(self, data) -> Response:
+        """Return page with count and its exactness."""
+        return Response(
+            OrderedDict(
+                (
+                    ("count", self.page.paginator.count),
+                    ("count_exact", self.page.paginator.count_exact),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                )
+            )
+        )
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination by a unique ordering without count query.
+
+    The cursor stores values of ordering fields of the boundary item,
+    the next page is selected by comparing rows with them, so every
+    page costs the same regardless of its depth.
+    """
+    page_size: int = 6
+    page_size_query_param: str = "limit"
+    max_page_size: int = 20
+    cursor_query_param: str = "cursor"
+    invalid_cursor_message: str = "Неверный курсор."
+
+    def __init__(self, ordering: tuple) -> None:
+        """Set ordering fields, the last one must be unique."""
+        self.ordering = ordering
+
+    def get_page_size(self, request) -> int:
+        """Return page size from query parameter or default."""
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    @staticmethod
+    def encode_cursor(reverse: bool, position: list) -> str:
+        """Return opaque cursor of direction and position."""
+        return base64.urlsafe_b64encode(
+            json.dumps([reverse, position], default=str).encode()
+        ).decode()
+
+    def get_link(self, reverse: bool, position: list) -> str:
+        """Return link to the page with cursor."""
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(reverse, position),
+        )
+
+    def decode_cursor(self, request) -> tuple:
+        """Return direction and position of the cursor."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return False, None
+        try:
+            reverse, position = json.loads(base64.urlsafe_b64decode(cursor))
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return bool(reverse), position
+
+    def get_position(self, instance) -> list:
+        """Return values of ordering fields of the instance."""
+        return [
+            getattr(instance, field.lstrip("-")) for field in self.ordering
+        ]
+
+    @staticmethod
+    def get_position_filter(ordering: tuple, position: list) -> Q:
+        """Return filter of rows following position in ordering."""
+        conditions = []
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            conditions.append(equal & Q(**{f"{name}__{lookup}": value}))
+            equal &= Q(**{name: value})
+        first = ordering[0].lstrip("-")
+        bound = "lte" if ordering[0].startswith("-") else "gte"
+        return Q(**{f"{first}__{bound}": position[0]}) & reduce(
+            or_, conditions
+        )
+
+    def paginate_queryset(self, queryset, request, view=None) -> list:
+        """Return page following or preceding the cursor."""
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        reverse, position = self.decode_cursor(request)
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(
+                    self.get_position_filter(ordering, position)
+                )
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = page
+        return page
+
+    def get_next_link(self):
+        """Return link to the next page."""
+        if not self.has_next or not self.page:
+            return None
+        return self.get_link(False, self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        """Return link to the previous page."""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.get_link(True, self.get_position(self.page[0]))
+
+    def get_paginated_response(self, data) -> Response:
+        """Return page with cursor links and without count."""
+        return Response(
+            OrderedDict(
+                (
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                )
+            )
+        )
+
+
+class CursorPaginationMixin:
+    """Use keyset pagination when requested with ?pagination=cursor.
+
+    Page-number pagination stays the default, views opt in by
+    returning ordering from `get_cursor_ordering`.
+    """
+    cursor_ordering: tuple = None
+
+    def get_cursor_ordering(self) -> tuple:
+        """Return unique ordering for keyset pagination or None."""
+        return self.cursor_ordering
+
+    @property
+    def paginator(self):
+        """Return keyset or page-number paginator instance."""
+        if not hasattr(self, "_paginator"):
+            ordering = self.get_cursor_ordering()
+            mode = self.request.query_params.get(PAGINATION_QUERY_PARAM)
+            if ordering and mode == CURSOR_MODE:
+                self._paginator = KeysetPagination(ordering)
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
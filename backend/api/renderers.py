@@ -0,0 +1,39 @@
+import json
+
+from rest_framework import renderers
+
+
+class ShoppingListRenderer(renderers.BaseRenderer):
+    """Base renderer for shopping list download formats.
+
+    The download view returns ready file responses, so only error
+    details are rendered here.
+    """
+    charset: str = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render error details as JSON text."""
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = (
+                f"application/json; charset={self.charset}"
+            )
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+class PDFRenderer(ShoppingListRenderer):
+    """Renderer for pdf shopping list."""
+    media_type: str = "application/pdf"
+    format: str = "pdf"
+
+
+class CSVRenderer(ShoppingListRenderer):
+    """Renderer for csv shopping list."""
+    media_type: str = "text/csv"
+    format: str = "csv"
+
+
+class PlainTextRenderer(ShoppingListRenderer):
+    """Renderer for plain text shopping list."""
+    media_type: str = "text/plain"
+    format: str = "txt"
@@ -0,0 +1,39 @@
+from core import routers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class ReplicaReadMixin:
+    """Serve safe requests of `replica_actions` from a read replica.
+
+    Users who sent a write recently stay on the primary for
+    `REPLICA_STICKY_SECONDS`, so they read their own changes.
+    """
+    replica_actions: tuple = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        """Switch reads of the rest of the request to a replica."""
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not routers.is_pinned(request.user)
+        ):
+            alias = routers.choose_replica()
+            if alias is not None:
+                self.read_alias_token = routers.read_alias.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Pin users who sent a write to the primary."""
+        if request.method not in SAFE_METHODS:
+            routers.pin(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        """Leave the replica even if the view raised."""
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            token = getattr(self, "read_alias_token", None)
+            if token is not None:
+                self.read_alias_token = None
+                routers.read_alias.reset(token)
@@ -1,29 +1,91 @@
 import base64
+import binascii
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from django.db import transaction
-from django.shortcuts import get_object_or_404
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from recipes.models import (FavouriteRecipe, Ingredient, Recipe,
-                            RecipeIngredient, ShoppingCart, Tag)
+from recipes.images import get_variant_url
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            ShoppingListItem, Tag)
 from rest_framework import serializers
-from users.models import Follow
+
+from .viewer import get_viewer_context
 
 User = get_user_model()
 
+BASE64_CHUNK_SIZE: int = 64 * 1024
+
 
 class Base64ImageField(serializers.ImageField):
     """Field representing a base64 encoded image."""
     def to_internal_value(self, data):
-        """Transform the base64 string into a native value."""
-        if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
+        """Transform the base64 string into a native value.
 
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
-
-        return super().to_internal_value(data)
+        The string is decoded in chunks to a temporary file and image
+        dimensions are checked from the header only.
+        """
+        if isinstance(data, str) and data.startswith("data:image"):
+            data = self.decode_to_file(data)
+        file = super().to_internal_value(data)
+        image = getattr(file, "image", None)
+        if image is not None and max(image.size) > (
+            settings.RECIPE_IMAGE_MAX_SIDE
+        ):
+            raise serializers.ValidationError(
+                "Изображение слишком большое, максимальный размер стороны "
+                f"{settings.RECIPE_IMAGE_MAX_SIDE} px."
+            )
+        return file
+
+    def decode_to_file(self, data: str) -> TemporaryUploadedFile:
+        """Decode base64 data url to a temporary file."""
+        header_end = data.find(";base64,")
+        if header_end == -1:
+            self.fail("invalid_image")
+        ext = data[:header_end].split("/")[-1]
+        file = TemporaryUploadedFile(
+            "temp." + ext, f"image/{ext}", 0, None
+        )
+        try:
+            for start in range(
+                header_end + len(";base64,"), len(data), BASE64_CHUNK_SIZE
+            ):
+                file.write(
+                    base64.b64decode(data[start:start + BASE64_CHUNK_SIZE])
+                )
+        except binascii.Error:
+            file.close()
+            self.fail("invalid_image")
+        file.size = file.tell()
+        file.seek(0)
+        return file
+
+
+class ImageVariantField(serializers.ImageField):
+    """Read only field representing a resized image variant."""
+    def __init__(self, variant: str, retrieve_variant: str = None, **kwargs):
+        """Set variant names for lists and for a single object."""
+        self.variant = variant
+        self.retrieve_variant = retrieve_variant or variant
+        kwargs["read_only"] = True
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        """Return absolute url of the image variant."""
+        if not obj.image:
+            return None
+        view = self.context.get("view")
+        variant = self.variant
+        if getattr(view, "action", None) == "retrieve":
+            variant = self.retrieve_variant
+        url = get_variant_url(obj.image, obj.image_variants, variant)
+        request = self.context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
 
 
 class TagsSerializer(serializers.ModelSerializer):
@@ -63,12 +125,10 @@ class CustomUserSerializer(UserSerializer):
 
     def get_is_subscribed(self, obj):
         """Return True if the user is subscribed to author."""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Follow.objects.filter(
-                user=request.user, author=obj
-            ).exists()
-        return False
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
+        viewer_context = get_viewer_context(self.context.get("request"))
+        return obj.pk in viewer_context.followed_author_ids
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -133,34 +193,34 @@ class SubscriptionSerializer(CustomUserSerializer):
         return ShortRecipeSerializer
 
     def get_recipes(self, obj):
-        """Return author's recipes if subcscribe."""
-        author_recipes = Recipe.objects.filter(author=obj)
-
-        if "recipes_limit" in self.context.get("request").GET:
-            recipes_limit = self.context.get("request").GET["recipes_limit"]
-            author_recipes = author_recipes[: int(recipes_limit)]
-
-        if author_recipes:
-            serializer = self.get_resipe_serializer()(
-                author_recipes,
-                context={"request": self.context.get("request")},
-                many=True,
-            )
-            return serializer.data
-
-        return []
+        """Return author's recipes if subcscribe.
+
+        Use recipes attached by the view when they are available.
+        """
+        author_recipes = getattr(obj, "author_recipes", None)
+        if author_recipes is None:
+            author_recipes = Recipe.objects.filter(author=obj)
+        serializer = self.get_resipe_serializer()(
+            author_recipes,
+            context={"request": self.context.get("request")},
+            many=True,
+        )
+        return serializer.data
 
     def get_recipes_count(self, obj):
         """Return count of author's recipes."""
+        if hasattr(obj, "recipes_count"):
+            return obj.recipes_count
         return Recipe.objects.filter(author=obj).count()
 
 
 class RecipeCreateIngredientSerializer(serializers.ModelSerializer):
-    """Serializer for ingredients field in RecipeWriteSerializer."""
-    id: int = serializers.PrimaryKeyRelatedField(
-        source="ingredient",
-        queryset=Ingredient.objects.all(),
-    )
+    """Serializer for ingredients field in RecipeWriteSerializer.
+
+    Ingredient ids are resolved in RecipeWriteSerializer with
+    a single query for all ingredients.
+    """
+    id: int = serializers.IntegerField(source="ingredient")
 
     class Meta:
         fields: tuple = ("id", "amount")
@@ -194,22 +254,18 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("author",)
 
-    def __is_auth_and_exists(self, obj, model) -> bool:
-        """Check if user is authorized or exists in model."""
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return model.objects.filter(
-                recipe=obj, user=request.user
-            ).exists()
-        return False
+    def __is_auth_and_exists(self, obj, ids_name: str) -> bool:
+        """Check if user is authorized and recipe is in his ids."""
+        viewer_context = get_viewer_context(self.context.get("request"))
+        return obj.pk in getattr(viewer_context, ids_name)
 
     def get_is_favorited(self, obj) -> bool:
         """Check for recipe in favorites."""
-        return self.__is_auth_and_exists(obj, FavouriteRecipe)
+        return self.__is_auth_and_exists(obj, "favourite_recipe_ids")
 
     def get_is_in_shopping_cart(self, obj) -> bool:
         """Chek for recipe in user's shopping cart."""
-        return self.__is_auth_and_exists(obj, ShoppingCart)
+        return self.__is_auth_and_exists(obj, "cart_recipe_ids")
 
     def validate_ingredients(self, values):
         """Ingredients validation."""
@@ -217,20 +273,23 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Нужно указать хотя бы один элемент.",
             )
-        ingredients_list: list = []
-        for value in values:
-            ingredient = get_object_or_404(
-                Ingredient, id=value["ingredient"].id
+        ingredient_ids = [value["ingredient"] for value in values]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                "Значения должны быть уникальны."
+            )
+        ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        missing_ids = [pk for pk in ingredient_ids if pk not in ingredients]
+        if missing_ids:
+            raise serializers.ValidationError(
+                f"Ингредиенты не найдены: {missing_ids}."
             )
+        for value in values:
             if int(value["amount"]) <= 0:
                 raise serializers.ValidationError(
                     {"Количество должно быть больше 0."}
                 )
-            if ingredient in ingredients_list:
-                raise serializers.ValidationError(
-                    "Значения должны быть уникальны."
-                )
-            ingredients_list.append(ingredient)
+            value["ingredient"] = ingredients[value["ingredient"]]
         return values
 
     def validate_tags(self, values):
@@ -248,20 +307,68 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             tags_list.append(tag)
         return values
 
+    @staticmethod
+    def set_ingredients(recipe: Recipe, ingredients: list) -> dict:
+        """Save only changed recipe ingredients.
+
+        Return ingredient amounts of the recipe before the change.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in RecipeIngredient.objects.filter(recipe=recipe)
+        }
+        old_amounts = {
+            ingredient_id: item.amount
+            for ingredient_id, item in current.items()
+        }
+        amounts = {
+            ingredient["ingredient"].pk: ingredient["amount"]
+            for ingredient in ingredients
+        }
+        RecipeIngredient.objects.filter(
+            recipe=recipe, ingredient_id__in=current.keys() - amounts.keys()
+        ).delete()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        )
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id, item.amount)
+            if amount != item.amount:
+                item.amount = amount
+                changed.append(item)
+        RecipeIngredient.objects.bulk_update(changed, ("amount",))
+        return old_amounts
+
+    def save(self, **kwargs):
+        """Save recipe and close temporary image file."""
+        try:
+            return super().save(**kwargs)
+        finally:
+            image = self.validated_data.get("image")
+            if image is not None:
+                image.close()
+
     @transaction.atomic
     def create(self, validated_data):
         """Create a new recipe model instance."""
         ingredients = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
         obj = Recipe.objects.create(**validated_data)
-        obj.save()
         obj.tags.set(tags)
-        for ingredient in ingredients:
-            RecipeIngredient.objects.create(
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
                 recipe=obj,
                 ingredient=ingredient["ingredient"],
                 amount=ingredient["amount"],
             )
+            for ingredient in ingredients
+        )
+        Recipe.objects.filter(pk=obj.pk).update_search_vector()
         return obj
 
     @transaction.atomic
@@ -273,26 +380,29 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Поля ингредиентов и тегов должны быть заполнены."
             )
+        Recipe.objects.filter(pk=instance.pk).lock()
         instance.tags.set(tags)
-        instance.ingredients.clear()
-        for ingredient in ingredients:
-            RecipeIngredient.objects.update_or_create(
-                recipe=instance,
-                ingredient=ingredient["ingredient"],
-                amount=ingredient["amount"],
-            )
-        return super().update(instance, validated_data)
+        old_amounts = self.set_ingredients(instance, ingredients)
+        instance = super().update(instance, validated_data)
+        ShoppingListItem.objects.change_recipe(instance.pk, old_amounts)
+        Recipe.objects.filter(pk=instance.pk).update_search_vector()
+        return instance
 
     def to_representation(self, instance):
         """Return recipe representation."""
+        request = self.context.get("request")
+        if request is not None:
+            instance = Recipe.objects.for_read(request.user).get(
+                pk=instance.pk
+            )
         return RecipeReadSerializer(
-            instance, context={"request": self.context.get("request")}
+            instance, context={"request": request}
         ).data
 
 
 class RecipeReadSerializer(serializers.ModelSerializer):
     """Serializer for safe HTTP methods and to representation."""
-    image = Base64ImageField()
+    image = ImageVariantField(variant="card", retrieve_variant="detail")
     tags = TagsSerializer(many=True, read_only=True)
     author = CustomUserSerializer(
         read_only=True,
@@ -305,24 +415,45 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model: Recipe = Recipe
-        exclude: tuple = ("pub_date",)
+        exclude: tuple = (
+            "pub_date",
+            "search_vector",
+            "image_variants",
+            "in_carts_count",
+        )
 
-    def __is_auth_and_exists(self, obj, model) -> bool:
-        """Check if user is authorized or exists in model."""
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return model.objects.filter(
-                recipe=obj, user=request.user
-            ).exists()
-        return False
+    def __is_auth_and_exists(self, obj, ids_name: str, annotation: str):
+        """Check if user is authorized and recipe is in his ids.
+
+        Use the queryset annotation when the recipe was fetched
+        with Recipe.objects.for_read().
+        """
+        if hasattr(obj, annotation):
+            return getattr(obj, annotation)
+        viewer_context = get_viewer_context(self.context.get("request"))
+        return obj.pk in getattr(viewer_context, ids_name)
 
     def get_is_favorited(self, obj):
         """Check if recipe in favourite."""
-        return self.__is_auth_and_exists(obj, FavouriteRecipe)
+        return self.__is_auth_and_exists(
+            obj, "favourite_recipe_ids", "is_favorited"
+        )
 
     def get_is_in_shopping_cart(self, obj):
         """Check if recipe in shopping cart."""
-        return self.__is_auth_and_exists(obj, ShoppingCart)
+        return self.__is_auth_and_exists(
+            obj, "cart_recipe_ids", "is_in_shopping_cart"
+        )
+
+
+class RecipeListSerializer(RecipeReadSerializer):
+    """Serializer for recipe lists, without per-recipe counters."""
+
+    class Meta(RecipeReadSerializer.Meta):
+        exclude: tuple = (
+            *RecipeReadSerializer.Meta.exclude,
+            "favorites_count",
+        )
 
 
 class IngredientSerialiser(serializers.ModelSerializer):
@@ -334,6 +465,8 @@ class IngredientSerialiser(serializers.ModelSerializer):
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """Serializer for short recipe representation."""
+    image = ImageVariantField(variant="thumbnail")
+
     class Meta:
         model: Recipe = Recipe
         fields: tuple = ("id", "name", "image", "cooking_time")
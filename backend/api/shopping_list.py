@@ -0,0 +1,156 @@
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from recipes.models import ShoppingListItem
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FILENAME: str = "shoppingcart.{format}"
+FONT_NAME: str = "Ost"
+FONT_PATH: str = str(settings.BASE_DIR / "data" / "Quicksand.ttf")
+CACHE_KEY: str = "shopping_list:pdf:{fingerprint}"
+EMPTY_MESSAGE: str = "У вас нет рецептов в списке покупок :("
+
+
+@lru_cache(maxsize=None)
+def register_font() -> str:
+    """Register the PDF font once per process and return its name."""
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+    return FONT_NAME
+
+
+def get_ingredients_queryset(user):
+    """Return ingredients from user's shopping list with total amounts."""
+    return (
+        ShoppingListItem.objects.filter(user=user)
+        .values("ingredient__name", "ingredient__measurement_unit")
+        .annotate(amount=F("total_amount"))
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+    )
+
+
+def get_ingredients(user) -> list:
+    """Return a list of summed ingredients from user's shopping cart."""
+    return list(get_ingredients_queryset(user))
+
+
+def format_line(index: int, ingredient: dict) -> str:
+    """Return a numbered shopping list line."""
+    return (
+        f'{index}. {ingredient["ingredient__name"]} - '
+        f'{ingredient["amount"]} '
+        f'{ingredient["ingredient__measurement_unit"]}.'
+    )
+
+
+def get_fingerprint(user, ingredients: list, today: str) -> str:
+    """Return a fingerprint of the shopping list content."""
+    content = repr((user.pk, today, ingredients)).encode()
+    return hashlib.sha1(content).hexdigest()
+
+
+def render_pdf(ingredients: list, today: str) -> bytes:
+    """Render shopping list to pdf."""
+    buffer = io.BytesIO()
+    page = canvas.Canvas(buffer)
+    x_position, y_position = 50, 800
+    page.setFont(register_font(), 18)
+    if ingredients:
+        indent = 20
+        page.drawString(x_position, y_position, get_title(today))
+        for index, ingredient in enumerate(ingredients, start=1):
+            page.drawString(
+                x_position,
+                y_position - indent,
+                format_line(index, ingredient),
+            )
+            y_position -= 15
+            if y_position <= 50:
+                page.showPage()
+                y_position = 800
+    else:
+        page.drawString(x_position, y_position, EMPTY_MESSAGE)
+    page.save()
+    return buffer.getvalue()
+
+
+def get_pdf(fingerprint: str, ingredients: list, today: str) -> bytes:
+    """Return rendered pdf from cache, render it if missing."""
+    key = CACHE_KEY.format(fingerprint=fingerprint)
+    content = cache.get(key)
+    if content is None:
+        content = render_pdf(ingredients, today)
+        cache.set(key, content, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+    return content
+
+
+def get_today() -> str:
+    """Return today's date for the shopping list title."""
+    return f"{datetime.now():%Y-%m-%d}"
+
+
+def get_title(today: str) -> str:
+    """Return shopping list title."""
+    return f"Cписок покупок {today}:"
+
+
+class Echo:
+    """File-like object returning written value for csv writer."""
+    def write(self, value: str) -> str:
+        """Return value instead of storing it."""
+        return value
+
+
+def stream_txt(ingredients, today: str):
+    """Yield shopping list as plain text lines."""
+    index = 0
+    for index, ingredient in enumerate(ingredients, start=1):
+        if index == 1:
+            yield f"{get_title(today)}\n"
+        yield f"{format_line(index, ingredient)}\n"
+    if not index:
+        yield f"{EMPTY_MESSAGE}\n"
+
+
+def stream_csv(ingredients, today: str):
+    """Yield shopping list as csv rows."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(("name", "amount", "measurement_unit"))
+    for ingredient in ingredients:
+        yield writer.writerow(
+            (
+                ingredient["ingredient__name"],
+                ingredient["amount"],
+                ingredient["ingredient__measurement_unit"],
+            )
+        )
+
+
+def stream_json(ingredients, today: str):
+    """Yield shopping list as a JSON array."""
+    separator = ""
+    yield "["
+    for ingredient in ingredients:
+        item = {
+            "name": ingredient["ingredient__name"],
+            "amount": ingredient["amount"],
+            "measurement_unit": ingredient["ingredient__measurement_unit"],
+        }
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ", "
+    yield "]"
+
+
+STREAMS: dict = {
+    "txt": stream_txt,
+    "csv": stream_csv,
+    "json": stream_json,
+}
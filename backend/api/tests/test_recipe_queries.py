@@ -0,0 +1,53 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+RECIPES_COUNTS: tuple = (1, 10)
+# Versions, count estimate, count, recipes, tags, authors, ingredients.
+LIST_QUERIES: int = 7
+# Versions, recipe, tags, author, ingredients.
+DETAIL_QUERIES: int = 5
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", RECIPES_COUNTS)
+@pytest.mark.parametrize("authenticated", (True, False))
+def test_recipe_list_queries_do_not_grow(
+    user_client,
+    author,
+    make_recipes,
+    django_assert_num_queries,
+    count,
+    authenticated,
+):
+    """Recipe list is read in the same number of queries for any size."""
+    make_recipes(author, count, ingredients_count=count)
+    client = user_client if authenticated else APIClient()
+    with django_assert_num_queries(LIST_QUERIES):
+        response = client.get(
+            reverse("api:recipe-list"), {"limit": count}
+        )
+    assert response.status_code == 200
+    assert len(response.data["results"]) == count
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", RECIPES_COUNTS)
+@pytest.mark.parametrize("authenticated", (True, False))
+def test_recipe_detail_queries_do_not_grow(
+    user_client,
+    author,
+    make_recipes,
+    django_assert_num_queries,
+    count,
+    authenticated,
+):
+    """Recipe is read in the same number of queries for any size."""
+    recipe = make_recipes(author, count, ingredients_count=count)[0]
+    client = user_client if authenticated else APIClient()
+    with django_assert_num_queries(DETAIL_QUERIES):
+        response = client.get(
+            reverse("api:recipe-detail", kwargs={"pk": recipe.pk})
+        )
+    assert response.status_code == 200
+    assert len(response.data["ingredients"]) == count
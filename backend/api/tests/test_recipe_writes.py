@@ -0,0 +1,73 @@
+import pytest
+from django.urls import reverse
+
+INGREDIENTS_COUNTS: tuple = (1, 30, 100)
+CREATE_QUERIES: int = 19
+# Replaced ingredients are deleted and inserted, kept ones are updated.
+REPLACE_QUERIES: int = 22
+CHANGE_QUERIES: int = 21
+DELETE_QUERIES: int = 12
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", INGREDIENTS_COUNTS)
+def test_recipe_create_queries_do_not_grow(
+    user_client, recipe_data, ingredients, django_assert_num_queries, count
+):
+    """Recipe is created in the same number of queries for any size."""
+    data = recipe_data(ingredients[:count])
+    with django_assert_num_queries(CREATE_QUERIES):
+        response = user_client.post(
+            reverse("api:recipe-list"), data, format="json"
+        )
+    assert response.status_code == 201
+    assert len(response.data["ingredients"]) == count
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", INGREDIENTS_COUNTS)
+@pytest.mark.parametrize(
+    ("replaced", "queries"),
+    ((True, REPLACE_QUERIES), (False, CHANGE_QUERIES)),
+)
+def test_recipe_update_queries_do_not_grow(
+    user,
+    user_client,
+    recipe_data,
+    ingredients,
+    make_recipes,
+    django_assert_num_queries,
+    count,
+    replaced,
+    queries,
+):
+    """Recipe is updated in the same number of queries for any size.
+
+    Ingredients are either all replaced with other ones or kept
+    with changed amounts.
+    """
+    recipe = make_recipes(user, 1, ingredients_count=count)[0]
+    new_ingredients = ingredients[-count:] if replaced else ingredients[:count]
+    data = recipe_data(new_ingredients)
+    with django_assert_num_queries(queries):
+        response = user_client.patch(
+            reverse("api:recipe-detail", kwargs={"pk": recipe.pk}),
+            data,
+            format="json",
+        )
+    assert response.status_code == 200
+    assert len(response.data["ingredients"]) == count
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", INGREDIENTS_COUNTS)
+def test_recipe_delete_queries_do_not_grow(
+    user, user_client, make_recipes, django_assert_num_queries, count
+):
+    """Recipe is deleted in the same number of queries for any size."""
+    recipe = make_recipes(user, 1, ingredients_count=count)[0]
+    with django_assert_num_queries(DELETE_QUERIES):
+        response = user_client.delete(
+            reverse("api:recipe-detail", kwargs={"pk": recipe.pk})
+        )
+    assert response.status_code == 204
@@ -0,0 +1,44 @@
+import pytest
+from core import routers
+from django.db import DEFAULT_DB_ALIAS
+from recipes.models import Recipe
+
+REPLICA: str = "replica_test"
+
+
+@pytest.fixture
+def read_aliases(settings, monkeypatch):
+    """Route reads to a fake replica and record the chosen aliases."""
+    settings.READ_REPLICAS = [REPLICA]
+    monkeypatch.setattr(routers, "choose_replica", lambda: REPLICA)
+    aliases = []
+
+    def db_for_read(self, model, **hints):
+        aliases.append((model, routers.read_alias.get()))
+        return DEFAULT_DB_ALIAS
+
+    monkeypatch.setattr(routers.ReplicaRouter, "db_for_read", db_for_read)
+    return aliases
+
+
+@pytest.mark.django_db
+def test_cache_miss_reads_primary(client, author, make_recipes, read_aliases):
+    """Cached recipes and counts are never read from a replica."""
+    make_recipes(author, 2)
+    response = client.get("/api/recipes/")
+    assert response.status_code == 200
+    assert response["X-Cache"] == "MISS"
+    recipe_aliases = {
+        alias for model, alias in read_aliases if model is Recipe
+    }
+    assert recipe_aliases == {None}
+
+
+@pytest.mark.django_db
+def test_authenticated_reads_replica(
+    user_client, author, make_recipes, read_aliases
+):
+    """Uncached reads of authenticated users go to the replica."""
+    make_recipes(author, 2)
+    assert user_client.get("/api/recipes/").status_code == 200
+    assert (Recipe, REPLICA) in read_aliases
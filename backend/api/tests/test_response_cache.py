@@ -0,0 +1,82 @@
+import pytest
+from core.models import Version
+from core.signals import RECIPE_SCOPE
+from django.urls import reverse
+from recipes.models import FavouriteRecipe
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+def test_cached_links_follow_host(settings, author, make_recipes):
+    """Responses cached for one host are not served to another."""
+    settings.ALLOWED_HOSTS = ["first.ru", "second.ru"]
+    make_recipes(author, 1)
+    url = reverse("api:recipe-list")
+    client = APIClient()
+    client.get(url, HTTP_HOST="first.ru")
+    response = client.get(url, HTTP_HOST="second.ru", secure=True)
+    assert response["X-Cache"] == "MISS"
+    assert response.data["results"][0]["image"].startswith(
+        "https://second.ru/"
+    )
+
+
+@pytest.mark.django_db
+def test_recipe_is_invalidated_by_own_changes(
+    author, make_recipes, django_capture_on_commit_callbacks
+):
+    """Cached recipe outlives changes of other recipes only."""
+    recipe, other = make_recipes(author, 2)
+    url = reverse("api:recipe-detail", kwargs={"pk": recipe.pk})
+    client = APIClient()
+    client.get(url)
+    other.name = "Другой рецепт"
+    with django_capture_on_commit_callbacks(execute=True):
+        other.save()
+    assert client.get(url)["X-Cache"] == "HIT"
+    recipe.name = "Новое название"
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe.save()
+    response = client.get(url)
+    assert response["X-Cache"] == "MISS"
+    assert response.data["name"] == "Новое название"
+
+
+@pytest.mark.django_db
+def test_favourite_invalidates_only_its_recipe(
+    user_client, author, make_recipes, django_capture_on_commit_callbacks
+):
+    """Favourites change the recipe counter, not cached recipe lists."""
+    recipe = make_recipes(author, 1)[0]
+    list_url = reverse("api:recipe-list")
+    detail_url = reverse("api:recipe-detail", kwargs={"pk": recipe.pk})
+    client = APIClient()
+    assert "favorites_count" not in client.get(list_url).data["results"][0]
+    assert client.get(detail_url).data["favorites_count"] == 0
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post(
+            reverse("api:recipe-favorite", kwargs={"pk": recipe.pk})
+        )
+    assert response.status_code == 201
+    assert client.get(list_url)["X-Cache"] == "HIT"
+    response = client.get(detail_url)
+    assert response["X-Cache"] == "MISS"
+    assert response.data["favorites_count"] == 1
+
+
+@pytest.mark.django_db
+def test_deleted_recipe_drops_its_version(
+    user, author, make_recipes, django_capture_on_commit_callbacks
+):
+    """Deleted recipe leaves no version row and no cached response."""
+    recipe = make_recipes(author, 1)[0]
+    FavouriteRecipe.objects.create(user=user, recipe=recipe)
+    scope = RECIPE_SCOPE.format(recipe_id=recipe.pk)
+    url = reverse("api:recipe-detail", kwargs={"pk": recipe.pk})
+    client = APIClient()
+    assert client.get(url).status_code == 200
+    assert Version.objects.filter(scope=scope).exists()
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe.delete()
+    assert not Version.objects.filter(scope=scope).exists()
+    assert client.get(url).status_code == 404
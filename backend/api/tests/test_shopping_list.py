@@ -0,0 +1,20 @@
+import pytest
+from django.urls import reverse
+from recipes.models import ShoppingCart
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("format", ("txt", "csv", "json"))
+def test_streamed_shopping_list_is_read_in_view(
+    format, user, user_client, author, make_recipes,
+    django_assert_num_queries
+):
+    """Streaming the shopping list body makes no database queries."""
+    for recipe in make_recipes(author, 2):
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    url = reverse("api:recipe-download-shopping-cart")
+    response = user_client.get(url, {"format": format})
+    assert response.status_code == 200
+    with django_assert_num_queries(0):
+        content = b"".join(response.streaming_content).decode()
+    assert "Ингредиент" in content
@@ -0,0 +1,34 @@
+import pytest
+from django.urls import reverse
+from recipes.models import Recipe
+from users.models import Follow
+
+
+@pytest.mark.django_db
+def test_empty_subscriptions_with_recipes_limit(user_client):
+    """User without subscriptions gets an empty page."""
+    response = user_client.get(
+        reverse("api:users-subscriptions"), {"recipes_limit": 3}
+    )
+    assert response.status_code == 200
+    assert response.data["results"] == []
+
+
+@pytest.mark.django_db
+def test_subscriptions_recipes_are_limited(
+    user, user_client, author, make_recipes
+):
+    """Only `recipes_limit` latest recipes of every author are returned."""
+    make_recipes(author, 5)
+    Follow.objects.create(user=user, author=author)
+    response = user_client.get(
+        reverse("api:users-subscriptions"), {"recipes_limit": 3}
+    )
+    assert response.status_code == 200
+    assert len(response.data["results"][0]["recipes"]) == 3
+
+
+@pytest.mark.django_db
+def test_top_per_author_without_authors():
+    """Ranking recipes of no authors makes no query."""
+    assert list(Recipe.objects.filter(author__in=[]).top_per_author(3)) == []
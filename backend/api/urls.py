@@ -2,7 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (CustomUserViewSet, IngredientsVewSet, RecipeViewSet,
-                    TagsViewSet)
+                    TagsViewSet, response_cache_stats)
 
 app_name: str = "api"
 
@@ -13,5 +13,8 @@ router.register("users", CustomUserViewSet, basename="users")
 router.register("ingredients", IngredientsVewSet)
 
 urlpatterns: list = [
+    path(
+        "cache-stats/", response_cache_stats, name="response_cache_stats"
+    ),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,59 @@
+from django.utils.functional import cached_property
+from recipes.models import FavouriteRecipe, ShoppingCart
+from users.models import Follow
+
+VIEWER_CONTEXT_ATTRIBUTE: str = "_viewer_context"
+
+
+class ViewerContext:
+    """Request-scoped state of the authenticated user.
+
+    Ids are fetched lazily once per request and kept as integer sets,
+    so serializers can answer per-object flags without queries.
+    """
+    def __init__(self, user) -> None:
+        self.user = user
+
+    def __ids(self, queryset, field: str) -> frozenset:
+        """Return a set of ids from queryset or empty set for anonymous."""
+        if self.user is None or not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(
+            queryset.filter(user=self.user).values_list(field, flat=True)
+        )
+
+    @cached_property
+    def followed_author_ids(self) -> frozenset:
+        """Return ids of authors followed by the user."""
+        return self.__ids(Follow.objects.all(), "author_id")
+
+    @cached_property
+    def favourite_recipe_ids(self) -> frozenset:
+        """Return ids of recipes in the user's favourites."""
+        return self.__ids(FavouriteRecipe.objects.all(), "recipe_id")
+
+    @cached_property
+    def cart_recipe_ids(self) -> frozenset:
+        """Return ids of recipes in the user's shopping cart."""
+        return self.__ids(ShoppingCart.objects.all(), "recipe_id")
+
+    def invalidate(self) -> None:
+        """Drop fetched ids after the user's state was changed."""
+        for name in (
+            "followed_author_ids",
+            "favourite_recipe_ids",
+            "cart_recipe_ids",
+        ):
+            self.__dict__.pop(name, None)
+
+
+def get_viewer_context(request) -> ViewerContext:
+    """Return viewer context stored on the request, create if missing."""
+    if request is None:
+        return ViewerContext(None)
+    http_request = getattr(request, "_request", request)
+    viewer_context = getattr(http_request, VIEWER_CONTEXT_ATTRIBUTE, None)
+    if viewer_context is None or viewer_context.user != request.user:
+        viewer_context = ViewerContext(request.user)
+        setattr(http_request, VIEWER_CONTEXT_ATTRIBUTE, viewer_context)
+    return viewer_context
@@ -1,56 +1,117 @@
 import io
-import os
-from datetime import datetime
+from collections import defaultdict
 
+from core import response_cache
+from core.signals import (AUTHORS_SCOPE, INGREDIENTS_SCOPE, RECIPE_SCOPE,
+                          RECIPES_SCOPE, TAGS_SCOPE, USERS_SCOPE, VIEWER_SCOPE)
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models.aggregates import Sum
-from django.http import FileResponse
+from django.db import transaction
+from django.db.models import BooleanField, F, Value
+from django.db.models.functions import Coalesce
+from django.http import (FileResponse, HttpResponse, HttpResponseNotModified,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from recipes.models import (FavouriteRecipe, Ingredient, Recipe,
-                            RecipeIngredient, ShoppingCart, Tag)
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (FavouriteRecipe, Ingredient, Recipe, ShoppingCart,
+                            Tag)
 from rest_framework import exceptions, status, viewsets
-from rest_framework.decorators import action
-from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import (SAFE_METHODS, IsAdminUser,
+                                        IsAuthenticated)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from users.models import Follow
 
-from .filters import IngredientFilter, RecipeFilter
-from .pagination import CustomPageNumberPagination
+from . import shopping_list
+from .cache import ResponseCacheMixin
+from .conditional import ConditionalGetMixin
+from .filters import RecipeFilter
+from .pagination import CachedCountPagination, CursorPaginationMixin
 from .permissions import CurrentUserOnly, RecipePermission
-from .serializers import (IngredientSerialiser, RecipeReadSerializer,
-                          RecipeWriteSerializer, ShortRecipeSerializer,
-                          SubscriptionSerializer, TagsSerializer)
+from .renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+from .replica import ReplicaReadMixin
+from .serializers import (IngredientSerialiser, RecipeListSerializer,
+                          RecipeReadSerializer, RecipeWriteSerializer,
+                          ShortRecipeSerializer, SubscriptionSerializer,
+                          TagsSerializer)
+from .viewer import get_viewer_context
 
 User = get_user_model()
 
-FILENAME = "shoppingcart.pdf"
 
-
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """Viewset for Tags."""
+    version_scopes = (TAGS_SCOPE,)
+    cache_scope = TAGS_SCOPE
     queryset = Tag.objects.all()
     serializer_class = TagsSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    CursorPaginationMixin,
+    viewsets.ModelViewSet,
+):
     """Viewset for recipes."""
+    version_scopes = (RECIPES_SCOPE,)
+    cache_scope = RECIPES_SCOPE
+    cursor_ordering = ("-pub_date", "-id")
+    viewer_dependent = True
     queryset = Recipe.objects.all()
     permission_classes = (RecipePermission,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
-    pagination_class = CustomPageNumberPagination
+    pagination_class = CachedCountPagination
+
+    def get_data_scopes(self) -> tuple:
+        """Get scopes of the data, a single recipe has its own.
+
+        A recipe is not invalidated by changes of other recipes, only
+        by its own changes and by changes of users, tags and
+        ingredients it may refer to.
+        """
+        if self.action != "retrieve":
+            return self.version_scopes
+        return (
+            RECIPE_SCOPE.format(recipe_id=self.kwargs["pk"]),
+            AUTHORS_SCOPE,
+            TAGS_SCOPE,
+            INGREDIENTS_SCOPE,
+        )
+
+    def get_cache_scopes(self) -> tuple:
+        """Get scopes the cached data depends on."""
+        return self.get_data_scopes()
+
+    def get_count_scopes(self):
+        """Get scopes the paginated count depends on."""
+        return self.get_version_scopes()
+
+    def get_queryset(self):
+        """Get read-optimised queryset for safe HTTP methods."""
+        if self.request.method in SAFE_METHODS:
+            return Recipe.objects.for_read(self.request.user)
+        return super().get_queryset()
 
     def perform_create(self, serializer):
         """Save author of recipe to db."""
         serializer.save(author=self.request.user)
 
     def get_serializer_class(self):
-        """Get write or read serializer."""
+        """Get write, list or read serializer."""
+        if self.action == "list":
+            return RecipeListSerializer
         if self.request.method in SAFE_METHODS:
             return RecipeReadSerializer
         return RecipeWriteSerializer
@@ -63,8 +124,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def favorite(self, request, pk):
         """Add or delete recipe from Favorites."""
         if request.method == "POST":
-            return self.add_to(FavouriteRecipe, request.user, pk)
-        return self.delete_from(FavouriteRecipe, request.user, pk)
+            response = self.add_to(FavouriteRecipe, request.user, pk)
+        else:
+            response = self.delete_from(FavouriteRecipe, request.user, pk)
+        get_viewer_context(request).invalidate()
+        return response
 
     @action(
         detail=True,
@@ -74,59 +138,77 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def shopping_cart(self, request, pk):
         """Add or delete recipe from shopping cart."""
         if request.method == "POST":
-            return self.add_to(ShoppingCart, request.user, pk)
-        return self.delete_from(ShoppingCart, request.user, pk)
+            response = self.add_to(ShoppingCart, request.user, pk)
+        else:
+            response = self.delete_from(ShoppingCart, request.user, pk)
+        get_viewer_context(request).invalidate()
+        return response
 
     @staticmethod
-    def make_shopping_cart_pdf(request) -> FileResponse:
-        """Make pdf file from shopping cart."""
-        buffer = io.BytesIO()
-        page = canvas.Canvas(buffer)
-        x_position, y_position = 50, 800
-        file_path = os.path.abspath("./data/")
-        pdfmetrics.registerFont(TTFont("Ost", f"{file_path}/Quicksand.ttf"))
-        page.setFont("Ost", 18)
-        ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__shopping_cart__user=request.user
-            )
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(amount=Sum("amount"))
+    def make_shopping_cart_pdf(request) -> HttpResponse:
+        """Make pdf file from shopping cart.
+
+        Rendered files are cached by the shopping list fingerprint,
+        which is also returned as ETag for conditional requests.
+        """
+        ingredients = shopping_list.get_ingredients(request.user)
+        today = shopping_list.get_today()
+        fingerprint = shopping_list.get_fingerprint(
+            request.user, ingredients, today
         )
-        if ingredients:
-            today = f"{datetime.now():%Y-%m-%d}"
-            indent = 20
-            page.drawString(x_position, y_position, f"Cписок покупок {today}:")
-            for index, ingredient in enumerate(ingredients, start=1):
-                page.drawString(
-                    x_position,
-                    y_position - indent,
-                    f'{index}. {ingredient["ingredient__name"]} - '
-                    f'{ingredient["amount"]} '
-                    f'{ingredient["ingredient__measurement_unit"]}.',
-                )
-                y_position -= 15
-                if y_position <= 50:
-                    page.showPage()
-                    y_position = 800
-            page.save()
-            buffer.seek(0)
-            return FileResponse(buffer, as_attachment=True, filename=FILENAME)
-        page.drawString(
-            x_position, y_position, "У вас нет рецептов в списке покупок :("
+        etag = quote_etag(fingerprint)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                io.BytesIO(
+                    shopping_list.get_pdf(fingerprint, ingredients, today)
+                ),
+                as_attachment=bool(ingredients),
+                filename=shopping_list.FILENAME.format(format="pdf"),
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    @staticmethod
+    def make_shopping_cart_stream(request) -> StreamingHttpResponse:
+        """Stream shopping cart in a text format chosen by renderer.
+
+        Rows are fetched in the view, where request instrumentation still
+        records the query; only their formatting is streamed.
+        """
+        renderer = request.accepted_renderer
+        ingredients = shopping_list.get_ingredients(request.user)
+        response = StreamingHttpResponse(
+            shopping_list.STREAMS[renderer.format](
+                ingredients, shopping_list.get_today()
+            ),
+            content_type=f"{renderer.media_type}; charset=utf-8",
         )
-        page.save()
-        buffer.seek(0)
-        return FileResponse(buffer, as_attachment=False, filename=FILENAME)
+        filename = shopping_list.FILENAME.format(format=renderer.format)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
     @action(
-        detail=False, methods=["get"], permission_classes=(IsAuthenticated,)
+        detail=False,
+        methods=["get"],
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            PDFRenderer,
+            CSVRenderer,
+            PlainTextRenderer,
+            JSONRenderer,
+        ),
     )
-    def download_shopping_cart(self, request) -> FileResponse:
-        """Download shopping cart."""
-        return self.make_shopping_cart_pdf(request)
+    def download_shopping_cart(self, request) -> HttpResponse:
+        """Download shopping cart as pdf, csv, txt or json."""
+        if request.accepted_renderer.format == PDFRenderer.format:
+            return self.make_shopping_cart_pdf(request)
+        return self.make_shopping_cart_stream(request)
 
     @staticmethod
+    @transaction.atomic
     def add_to(model, user: User, pk: int) -> Response:
         """Add object to model."""
         if model.objects.filter(user=user, recipe__id=pk).exists():
@@ -145,6 +227,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @staticmethod
+    @transaction.atomic
     def delete_from(model, user: User, pk: int) -> Response:
         """Delete a recipe from model."""
         recipe = get_object_or_404(Recipe, pk=pk)
@@ -158,18 +241,69 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
 
-class IngredientsVewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientsVewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """Viewset for ingredients."""
+    version_scopes = (INGREDIENTS_SCOPE,)
+    cache_scope = INGREDIENTS_SCOPE
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerialiser
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilter
 
+    def get_limit(self) -> int:
+        """Return validated limit query parameter capped by the setting."""
+        limit = self.request.query_params.get("limit")
+        if limit is None:
+            return settings.INGREDIENT_SEARCH_LIMIT
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            raise exceptions.ValidationError(
+                {"limit": "Значение должно быть положительным целым числом."}
+            )
+        return min(limit, settings.INGREDIENT_SEARCH_LIMIT)
+
+    def filter_queryset(self, queryset):
+        """Search ingredients by name in the in-memory index on list."""
+        if self.action != "list":
+            return super().filter_queryset(queryset)
+        return ingredient_index.search(
+            self.request.query_params.get("name", ""), self.get_limit()
+        )
+
+
+@api_view(("GET",))
+@permission_classes((IsAdminUser,))
+def response_cache_stats(request):
+    """Return hits and misses of the anonymous response cache."""
+    return Response(
+        response_cache.get_stats(
+            (RECIPES_SCOPE, TAGS_SCOPE, INGREDIENTS_SCOPE)
+        )
+    )
 
-class CustomUserViewSet(UserViewSet):
+
+class CustomUserViewSet(ReplicaReadMixin, CursorPaginationMixin, UserViewSet):
     """Viewset for users."""
     queryset = User.objects.all()
-    pagination_class = CustomPageNumberPagination
+    pagination_class = CachedCountPagination
+
+    def get_count_scopes(self):
+        """Get scopes the paginated count depends on."""
+        if self.action == "subscriptions":
+            return (VIEWER_SCOPE.format(user_id=self.request.user.pk),)
+        return (USERS_SCOPE,)
+
+    def get_cursor_ordering(self):
+        """Allow keyset pagination of subscriptions only."""
+        if self.action == "subscriptions":
+            return ("-subscription_id",)
+        return None
 
     @action(
         detail=False,
@@ -179,14 +313,61 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         """Get subscriptions list."""
-        user = self.request.user
-        user_subscriptions = user.follower.all()
-        authors = [item.author.id for item in user_subscriptions]
-        queryset = User.objects.filter(pk__in=authors)
+        queryset = self.get_subscriptions_queryset(self.request.user)
+        recipes_limit = self.get_recipes_limit()
         paginated_queryset = self.paginate_queryset(queryset)
-        serializer = self.get_serializer(paginated_queryset, many=True)
+        serializer = self.get_serializer(
+            self.attach_recipes(paginated_queryset, recipes_limit), many=True
+        )
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def get_subscriptions_queryset(user: User):
+        """Return authors followed by user with subscription data."""
+        return (
+            User.objects.filter(following__user=user)
+            .annotate(
+                is_subscribed=Value(True, output_field=BooleanField()),
+                recipes_count=Coalesce("stats__recipes_count", 0),
+                subscription_id=F("following__pk"),
+            )
+            .order_by("-subscription_id")
+        )
+
+    def get_recipes_limit(self):
+        """Return validated recipes_limit query parameter."""
+        recipes_limit = self.request.query_params.get("recipes_limit")
+        if recipes_limit is None:
+            return None
+        try:
+            recipes_limit = int(recipes_limit)
+        except ValueError:
+            recipes_limit = -1
+        if recipes_limit < 0:
+            raise exceptions.ValidationError(
+                {
+                    "recipes_limit": (
+                        "Значение должно быть неотрицательным целым числом."
+                    )
+                }
+            )
+        return recipes_limit
+
+    @staticmethod
+    def attach_recipes(authors: list, recipes_limit: int = None) -> list:
+        """Attach limited recipes to authors using a single query."""
+        if not authors:
+            return authors
+        recipes = Recipe.objects.filter(author__in=authors).top_per_author(
+            recipes_limit
+        )
+        author_recipes = defaultdict(list)
+        for recipe in recipes:
+            author_recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.author_recipes = author_recipes[author.pk]
+        return authors
+
     @action(
         detail=True,
         methods=("post", "delete"),
@@ -205,8 +386,13 @@ class CustomUserViewSet(UserViewSet):
                 )
             if Follow.objects.filter(user=user, author=author).exists():
                 raise exceptions.ValidationError("Подписка уже оформлена.")
+            recipes_limit = self.get_recipes_limit()
             Follow.objects.create(user=user, author=author)
-            serializer = self.get_serializer(author)
+            get_viewer_context(request).invalidate()
+            author = self.get_subscriptions_queryset(user).get(pk=author.pk)
+            serializer = self.get_serializer(
+                self.attach_recipes([author], recipes_limit)[0]
+            )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if self.request.method == "DELETE":
@@ -215,6 +401,7 @@ class CustomUserViewSet(UserViewSet):
                     "Подписка не была оформлена, либо уже удалена."
                 )
             get_object_or_404(Follow, user=user, author=author).delete()
+            get_viewer_context(request).invalidate()
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
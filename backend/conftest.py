@@ -0,0 +1,121 @@
+import pytest
+from django.core.cache import caches
+from recipes.images import SOURCE_KEY
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from rest_framework.test import APIClient
+
+IMAGE_NAME: str = "foodgram_backend/images/test.png"
+PNG_IMAGE: str = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAEAAAAAwCAIAAAAuKetIAAAAUk"
+    "lEQVR4nO3PMQ0AIADAMODEvyhkIYKjIVkVbPPsPX62dMCrBrQGtAa0BrQGtAa0BrQGtAa0"
+    "BrQGtAa0BrQGtAa0BrQGtAa0BrQGtAa0BrQGtAsHsAE8YOQp1QAAAABJRU5ErkJggg=="
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_environment(settings, tmp_path):
+    """Store media in a temporary directory and start with empty caches."""
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.SQL_INSTRUMENTATION_SAMPLE_RATE = 0
+    settings.PROFILING_SAMPLE_RATE = 0
+    settings.METRICS_DIR = ""
+    for cache in caches.all():
+        cache.clear()
+    ingredient_index.invalidate()
+
+
+@pytest.fixture
+def user(django_user_model):
+    """Return a regular user."""
+    return django_user_model.objects.create_user(
+        username="user",
+        email="user@foodgram.ru",
+        password="user_password",
+        first_name="Имя",
+        last_name="Фамилия",
+    )
+
+
+@pytest.fixture
+def author(django_user_model):
+    """Return another user who publishes recipes."""
+    return django_user_model.objects.create_user(
+        username="author",
+        email="author@foodgram.ru",
+        password="author_password",
+        first_name="Автор",
+        last_name="Рецептов",
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    """Return an API client authenticated as the user."""
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def tags():
+    """Return two tags."""
+    return [
+        Tag.objects.create(name=f"Тег {index}", color="#49B64E", slug=slug)
+        for index, slug in enumerate(("breakfast", "dinner"))
+    ]
+
+
+@pytest.fixture
+def ingredients():
+    """Return two hundred ingredients."""
+    return Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ингредиент {index}", measurement_unit="г")
+        for index in range(200)
+    )
+
+
+@pytest.fixture
+def make_recipes(tags, ingredients):
+    """Return a factory of recipes with tags and ingredients."""
+    def make_recipes(author, count: int, ingredients_count: int = 3) -> list:
+        recipes = []
+        for index in range(count):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f"Рецепт {index}",
+                text="Описание",
+                cooking_time=10,
+                image=IMAGE_NAME,
+                image_variants={SOURCE_KEY: IMAGE_NAME},
+            )
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=5
+                )
+                for ingredient in ingredients[:ingredients_count]
+            )
+            recipes.append(recipe)
+        return recipes
+
+    return make_recipes
+
+
+@pytest.fixture
+def recipe_data(tags):
+    """Return a factory of recipe payloads with the ingredients."""
+    def recipe_data(ingredients: list) -> dict:
+        return {
+            "name": "Рецепт",
+            "text": "Описание",
+            "cooking_time": 10,
+            "image": PNG_IMAGE,
+            "tags": [tag.pk for tag in tags],
+            "ingredients": [
+                {"id": ingredient.pk, "amount": index + 1}
+                for index, ingredient in enumerate(ingredients)
+            ],
+        }
+
+    return recipe_data
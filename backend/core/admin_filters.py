@@ -0,0 +1,77 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """List filter by a foreign key chosen with admin autocomplete.
+
+    Unlike RelatedFieldListFilter it does not load every related
+    object, options are searched through the related model admin,
+    which must define search_fields.
+    """
+    template: str = "admin/autocomplete_filter.html"
+    field_name: str = None
+
+    def __init__(self, request, params, model, model_admin) -> None:
+        """Build the autocomplete widget of the field."""
+        self.parameter_name = f"{self.field_name}__id__exact"
+        field = model._meta.get_field(self.field_name)
+        if self.title is None:
+            self.title = field.verbose_name
+        super().__init__(request, params, model, model_admin)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+        )
+        self.widget_id = f"autocomplete_filter_{self.field_name}"
+
+    @classmethod
+    def get_media(cls, model, admin_site) -> forms.Media:
+        """Return scripts and styles of the autocomplete widget."""
+        field = model._meta.get_field(cls.field_name)
+        return AutocompleteSelect(field, admin_site).media
+
+    def has_output(self) -> bool:
+        """Always show the filter."""
+        return True
+
+    def lookups(self, request, model_admin) -> tuple:
+        """Return no fixed choices, they are searched on demand."""
+        return ()
+
+    def rendered_widget(self) -> str:
+        """Return autocomplete select with the current value."""
+        return self.form_field.widget.render(
+            self.parameter_name, self.value(), attrs={"id": self.widget_id}
+        )
+
+    def queryset(self, request, queryset):
+        """Filter by the chosen related object."""
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+
+def autocomplete_filter(field_name: str) -> type:
+    """Return autocomplete filter class for the foreign key field."""
+    return type(
+        f"{field_name.title()}AutocompleteFilter",
+        (AutocompleteFilter,),
+        {"field_name": field_name},
+    )
+
+
+class AutocompleteFilterMixin:
+    """Add media of autocomplete list filters to a model admin."""
+    @property
+    def media(self) -> forms.Media:
+        """Return model admin media with autocomplete widget media."""
+        media = super().media
+        for list_filter in self.list_filter:
+            if isinstance(list_filter, type) and issubclass(
+                list_filter, AutocompleteFilter
+            ):
+                media += list_filter.get_media(self.model, self.admin_site)
+        return media
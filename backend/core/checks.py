@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PROCESS_CACHE_BACKENDS: tuple = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_replica_cache(app_configs, **kwargs) -> list:
+    """Require a shared cache for replica stickiness.
+
+    Users who wrote data are pinned to the primary in the default
+    cache, a cache of a single process loses the pin in other workers.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if not settings.READ_REPLICAS or backend not in PROCESS_CACHE_BACKENDS:
+        return []
+    return [
+        Error(
+            "DB_REPLICA_HOSTS requires a cache shared by all workers.",
+            hint="Set CACHE_BACKEND and CACHE_LOCATION, e.g. memcached.",
+            id="core.E001",
+        )
+    ]
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.dispatch import receiver
+
+
+@receiver(request_started)
+def check_connections(**kwargs) -> None:
+    """Close persistent connections which stopped working while idle.
+
+    Only connections idle for `DB_HEALTH_CHECK_INTERVAL` seconds are
+    pinged, so busy workers do not pay a round trip per request.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        idle = now - getattr(connection, "last_used", now)
+        if idle >= settings.DB_HEALTH_CHECK_INTERVAL and not (
+            connection.is_usable()
+        ):
+            connection.close()
+
+
+@receiver(request_finished)
+def mark_connections_used(**kwargs) -> None:
+    """Remember when open connections were last used."""
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.last_used = now
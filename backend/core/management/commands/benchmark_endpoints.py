@@ -0,0 +1,559 @@
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+DEFAULT_BUDGETS_PATH: str = str(
+    settings.BASE_DIR / "data" / "benchmark_budgets.json"
+)
+BENCHMARK_CACHE: str = "benchmark"
+ADMIN_USERNAME: str = "benchmark_admin"
+METRICS: tuple = ("queries", "p50_ms", "p95_ms", "memory_kib")
+MIN_LATENCY_SLACK_MS: float = 20
+# Name, method, URL name, URL arguments, query, client, expected status.
+# Values of URL arguments and the query are formatted with fixtures.
+CASES: tuple = (
+    ("tags", "get", "api:tag-list", None, {}, "anonymous", 200),
+    ("tag", "get", "api:tag-detail", {"pk": "{tag}"}, {}, "anonymous", 200),
+    ("recipes", "get", "api:recipe-list", None, {}, "anonymous", 200),
+    (
+        "recipes_page_50",
+        "get",
+        "api:recipe-list",
+        None,
+        {"page": 50},
+        "anonymous",
+        200,
+    ),
+    (
+        "recipes_cursor",
+        "get",
+        "api:recipe-list",
+        None,
+        {"pagination": "cursor"},
+        "anonymous",
+        200,
+    ),
+    (
+        "recipes_tags",
+        "get",
+        "api:recipe-list",
+        None,
+        {"tags": "{tag_slug}"},
+        "anonymous",
+        200,
+    ),
+    (
+        "recipes_author",
+        "get",
+        "api:recipe-list",
+        None,
+        {"author": "{author}"},
+        "anonymous",
+        200,
+    ),
+    (
+        "recipes_search",
+        "get",
+        "api:recipe-list",
+        None,
+        {"search": "{search}"},
+        "anonymous",
+        200,
+    ),
+    (
+        "recipe",
+        "get",
+        "api:recipe-detail",
+        {"pk": "{recipe}"},
+        {},
+        "anonymous",
+        200,
+    ),
+    (
+        "ingredients_search",
+        "get",
+        "api:ingredient-list",
+        None,
+        {"name": "{ingredient_name}"},
+        "anonymous",
+        200,
+    ),
+    (
+        "ingredient",
+        "get",
+        "api:ingredient-detail",
+        {"pk": "{ingredient}"},
+        {},
+        "anonymous",
+        200,
+    ),
+    ("users", "get", "api:users-list", None, {}, "anonymous", 200),
+    (
+        "user",
+        "get",
+        "api:users-detail",
+        {"id": "{author}"},
+        {},
+        "anonymous",
+        200,
+    ),
+    ("auth_recipes", "get", "api:recipe-list", None, {}, "user", 200),
+    (
+        "auth_recipes_tags",
+        "get",
+        "api:recipe-list",
+        None,
+        {"tags": "{tag_slug}"},
+        "user",
+        200,
+    ),
+    (
+        "auth_recipes_favorited",
+        "get",
+        "api:recipe-list",
+        None,
+        {"is_favorited": 1},
+        "user",
+        200,
+    ),
+    (
+        "auth_recipes_in_cart",
+        "get",
+        "api:recipe-list",
+        None,
+        {"is_in_shopping_cart": 1},
+        "user",
+        200,
+    ),
+    (
+        "auth_recipes_search",
+        "get",
+        "api:recipe-list",
+        None,
+        {"search": "{search}"},
+        "user",
+        200,
+    ),
+    (
+        "auth_recipe",
+        "get",
+        "api:recipe-detail",
+        {"pk": "{recipe}"},
+        {},
+        "user",
+        200,
+    ),
+    ("auth_users", "get", "api:users-list", None, {}, "user", 200),
+    (
+        "auth_user",
+        "get",
+        "api:users-detail",
+        {"id": "{author}"},
+        {},
+        "user",
+        200,
+    ),
+    ("auth_me", "get", "api:users-me", None, {}, "user", 200),
+    (
+        "auth_subscriptions",
+        "get",
+        "api:users-subscriptions",
+        None,
+        {"recipes_limit": 3},
+        "user",
+        200,
+    ),
+    (
+        "auth_subscriptions_cursor",
+        "get",
+        "api:users-subscriptions",
+        None,
+        {"recipes_limit": 3, "pagination": "cursor"},
+        "user",
+        200,
+    ),
+    (
+        "auth_cart_pdf",
+        "get",
+        "api:recipe-download-shopping-cart",
+        None,
+        {},
+        "user",
+        200,
+    ),
+    (
+        "auth_cart_csv",
+        "get",
+        "api:recipe-download-shopping-cart",
+        None,
+        {"format": "csv"},
+        "user",
+        200,
+    ),
+    (
+        "auth_favorite",
+        "post",
+        "api:recipe-favorite",
+        {"pk": "{new_recipe}"},
+        {},
+        "user",
+        201,
+    ),
+    (
+        "auth_shopping_cart",
+        "post",
+        "api:recipe-shopping-cart",
+        {"pk": "{new_recipe}"},
+        {},
+        "user",
+        201,
+    ),
+    (
+        "auth_subscribe",
+        "post",
+        "api:users-subscribe",
+        {"id": "{new_author}"},
+        {"recipes_limit": 3},
+        "user",
+        201,
+    ),
+    (
+        "admin_cache_stats",
+        "get",
+        "api:response_cache_stats",
+        None,
+        {},
+        "admin",
+        200,
+    ),
+)
+
+
+def percentile(values: list, percent: int) -> float:
+    """Return percentile of values with linear interpolation."""
+    return statistics.quantiles(values, n=100, method="inclusive")[
+        percent - 1
+    ]
+
+
+class Command(BaseCommand):
+    """Benchmark API endpoints against committed budgets."""
+    help: str = (
+        "Request every API route as anonymous and authenticated user "
+        "on a seeded test database, record query count, p50/p95 "
+        "latency and allocated memory and compare them with budgets"
+    )
+
+    def add_arguments(self, parser) -> None:
+        """Add dataset, repeats and budget arguments."""
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=50,
+            help="Measured requests per case",
+        )
+        parser.add_argument("--budgets", default=DEFAULT_BUDGETS_PATH)
+        parser.add_argument(
+            "--metrics",
+            nargs="+",
+            choices=METRICS,
+            default=METRICS,
+            help="Metrics compared with budgets, all by default",
+        )
+        parser.add_argument(
+            "--update-budgets",
+            action="store_true",
+            help="Write measured values with headroom to the budget file",
+        )
+        parser.add_argument(
+            "--headroom",
+            type=float,
+            default=2.0,
+            help="Multiplier of latency and memory in updated budgets",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database and its data between runs",
+        )
+        parser.add_argument(
+            "cases", nargs="*", help="Names of cases to run, all by default"
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Seed the test database, run cases and check budgets."""
+        names = {case[0] for case in CASES}
+        unknown = set(options["cases"]) - names
+        if unknown:
+            raise CommandError(f"Unknown cases: {', '.join(sorted(unknown))}")
+        if options["number"] < 2:
+            raise CommandError("Number of requests must be at least 2")
+        # Only the primary is replaced by the test database, reads of
+        # replica views must not reach the real replicas.
+        with override_settings(DATABASE_ROUTERS=[], READ_REPLICAS=[]):
+            results = self.run_in_test_db(options)
+        if options["update_budgets"]:
+            self.update_budgets(results, options)
+        else:
+            self.check_budgets(results, options["budgets"], options["metrics"])
+
+    def run_in_test_db(self, options: dict) -> dict:
+        """Run cases in a seeded test database, return their results."""
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        try:
+            if not Recipe.objects.exists():
+                self.seed(options)
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                CACHES={
+                    **settings.CACHES,
+                    BENCHMARK_CACHE: {
+                        "BACKEND": (
+                            "django.core.cache.backends.dummy.DummyCache"
+                        ),
+                    },
+                },
+                RESPONSE_CACHE_ALIAS=BENCHMARK_CACHE,
+                SQL_INSTRUMENTATION_SAMPLE_RATE=0,
+            ):
+                return self.run_cases(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+
+    def seed(self, options: dict) -> None:
+        """Fill the test database with ingredients and generated data."""
+        output = io.StringIO()
+        call_command("write_from_csv_to_db", stdout=output)
+        call_command(
+            "generate_dataset",
+            users=options["users"],
+            recipes=options["recipes"],
+            seed=options["seed"],
+            prefix="benchmark",
+            stdout=output,
+        )
+        User.objects.create_user(
+            username=ADMIN_USERNAME,
+            email=f"{ADMIN_USERNAME}@example.com",
+            is_staff=True,
+        )
+
+    @staticmethod
+    def get_fixtures() -> dict:
+        """Return the benchmark user and objects requested by cases."""
+        user = (
+            User.objects.filter(shopping_cart__isnull=False)
+            .annotate(follows=Count("follower", distinct=True))
+            .order_by("-follows", "pk")
+            .first()
+        )
+        if user is None:
+            raise CommandError("No user with a shopping cart in the data")
+        recipe = Recipe.objects.order_by("-pub_date", "-id").first()
+        ingredient = (
+            Ingredient.objects.annotate(
+                recipes=Count("ingredient_recipe")
+            )
+            .order_by("-recipes", "pk")
+            .first()
+        )
+        tag = Tag.objects.order_by("pk").first()
+        return {
+            "user": user,
+            "admin": User.objects.get(username=ADMIN_USERNAME),
+            "recipe": recipe.pk,
+            "author": recipe.author_id,
+            "tag": tag.pk,
+            "tag_slug": tag.slug,
+            "ingredient": ingredient.pk,
+            "ingredient_name": ingredient.name[:3],
+            "search": recipe.name.split(":")[0],
+            "new_recipe": (
+                Recipe.objects.exclude(favourite__user=user)
+                .exclude(shopping_cart__user=user)
+                .order_by("-pub_date", "-id")
+                .values_list("pk", flat=True)
+                .first()
+            ),
+            "new_author": (
+                User.objects.exclude(pk=user.pk)
+                .exclude(following__user=user)
+                .filter(recipe__isnull=False)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+                .first()
+            ),
+        }
+
+    def run_cases(self, options: dict) -> dict:
+        """Measure selected cases and print a table of results."""
+        fixtures = self.get_fixtures()
+        clients = {"anonymous": APIClient()}
+        for role in ("user", "admin"):
+            clients[role] = APIClient()
+            clients[role].force_authenticate(fixtures[role])
+        self.stdout.write(
+            f"{'case':<28}{'queries':>8}{'p50, ms':>10}"
+            f"{'p95, ms':>10}{'memory, KiB':>13}"
+        )
+        results = {}
+        for name, method, url_name, kwargs, query, role, status in CASES:
+            if options["cases"] and name not in options["cases"]:
+                continue
+            url = reverse(
+                url_name,
+                kwargs={
+                    key: value.format(**fixtures)
+                    for key, value in (kwargs or {}).items()
+                },
+            )
+            query = urlencode(
+                {
+                    key: str(value).format(**fixtures)
+                    for key, value in query.items()
+                }
+            )
+            if query:
+                url = f"{url}?{query}"
+            results[name] = self.measure(
+                lambda: getattr(clients[role], method)(url),
+                name,
+                status,
+                rollback=method != "get",
+                number=options["number"],
+            )
+            self.stdout.write(
+                f"{name:<28}"
+                f"{results[name]['queries']:>8}"
+                f"{results[name]['p50_ms']:>10.2f}"
+                f"{results[name]['p95_ms']:>10.2f}"
+                f"{results[name]['memory_kib']:>13.1f}"
+            )
+        return results
+
+    @staticmethod
+    def measure(
+        send, name: str, status: int, rollback: bool, number: int
+    ) -> dict:
+        """Return query count, latency percentiles and memory peak.
+
+        Requests which change data run in a transaction rolled back
+        after every request, so every repeat sees the same data.
+        """
+
+        def request():
+            with transaction.atomic():
+                response = send()
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                if rollback:
+                    transaction.set_rollback(True)
+            if response.status_code != status:
+                raise CommandError(
+                    f"{name}: status {response.status_code}, "
+                    f"expected {status}"
+                )
+
+        request()
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        # Later requests reset the query log the context slices.
+        query_count = len(queries)
+        timings = []
+        for _ in range(number):
+            started = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - started) * 1000)
+        tracemalloc.start()
+        try:
+            request()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            "queries": query_count,
+            "p50_ms": percentile(timings, 50),
+            "p95_ms": percentile(timings, 95),
+            "memory_kib": peak / 1024,
+        }
+
+    def check_budgets(self, results: dict, path: str, metrics) -> None:
+        """Fail if a result exceeds its budget or has no budget."""
+        try:
+            with open(path, encoding="utf-8") as file:
+                budgets = json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read budgets: {error}")
+        failures = []
+        for name, result in results.items():
+            if name not in budgets:
+                failures.append(f"{name}: no budget")
+                continue
+            failures.extend(
+                f"{name}: {metric} {round(result[metric], 2)} > "
+                f"{budgets[name][metric]}"
+                for metric in metrics
+                if metric in budgets[name]
+                and result[metric] > budgets[name][metric]
+            )
+        if failures:
+            raise CommandError(
+                "Budgets exceeded:\n" + "\n".join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS("All budgets are met"))
+
+    def update_budgets(self, results: dict, options: dict) -> None:
+        """Write exact query counts and latency, memory with headroom.
+
+        Latency budgets get at least `MIN_LATENCY_SLACK_MS` on top of
+        the measured value, fast requests are too noisy otherwise.
+        """
+        path = options["budgets"]
+        try:
+            with open(path, encoding="utf-8") as file:
+                budgets = json.load(file)
+        except FileNotFoundError:
+            budgets = {}
+        headroom = options["headroom"]
+        for name, result in results.items():
+            budgets[name] = {
+                "queries": result["queries"],
+                "memory_kib": round(result["memory_kib"] * headroom, 1),
+            }
+            for metric in ("p50_ms", "p95_ms"):
+                budgets[name][metric] = round(
+                    max(
+                        result[metric] * headroom,
+                        result[metric] + MIN_LATENCY_SLACK_MS,
+                    ),
+                    1,
+                )
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(budgets, file, indent=2, sort_keys=True)
+            file.write("\n")
+        self.stdout.write(self.style.SUCCESS(f"Budgets written to {path}"))
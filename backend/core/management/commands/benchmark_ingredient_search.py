@@ -0,0 +1,37 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+QUERIES: tuple = ("с", "са", "сах", "сахар", "мука", "ябл", "кур", "zzz")
+
+
+class Command(BaseCommand):
+    """Compare ingredient search in the index with the ORM filter."""
+    help: str = "Benchmark ingredient autocomplete: ORM filter vs index"
+
+    def add_arguments(self, parser) -> None:
+        """Add number of repeats argument."""
+        parser.add_argument("--number", type=int, default=200)
+
+    def handle(self, *args, **options) -> None:
+        """Run both searches for every query and print mean time."""
+        number = options["number"]
+        ingredient_index.build()
+        self.stdout.write(f"{'query':<8}{'orm, us':>12}{'index, us':>12}")
+        for query in QUERIES:
+            orm_time = timeit.timeit(
+                lambda: list(
+                    Ingredient.objects.filter(name__startswith=query)
+                ),
+                number=number,
+            )
+            index_time = timeit.timeit(
+                lambda: ingredient_index.search(query), number=number
+            )
+            self.stdout.write(
+                f"{query:<8}"
+                f"{orm_time / number * 10**6:>12.1f}"
+                f"{index_time / number * 10**6:>12.1f}"
+            )
@@ -0,0 +1,69 @@
+import timeit
+
+from api.pagination import CustomPageNumberPagination, KeysetPagination
+from api.views import RecipeViewSet
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Recipe
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+class Command(BaseCommand):
+    """Compare page-number and keyset pagination of the recipe feed."""
+    help: str = "Benchmark recipe feed pages: page number vs cursor"
+
+    def add_arguments(self, parser) -> None:
+        """Add pages, page size and number of repeats arguments."""
+        parser.add_argument(
+            "--pages", type=int, nargs="+", default=(1, 5000)
+        )
+        parser.add_argument("--limit", type=int, default=6)
+        parser.add_argument("--number", type=int, default=20)
+
+    def handle(self, *args, **options) -> None:
+        """Fetch every page in both modes and print mean time."""
+        limit, number = options["limit"], options["number"]
+        queryset = Recipe.objects.for_read(AnonymousUser())
+        total = Recipe.objects.count()
+        if max(options["pages"]) * limit > total:
+            raise CommandError(
+                f"Not enough recipes ({total}) for the deepest page"
+            )
+        ordering = RecipeViewSet.cursor_ordering
+        factory = APIRequestFactory()
+        self.stdout.write(
+            f"recipes: {total}\n"
+            f"{'page':>8}{'page number, ms':>18}{'cursor, ms':>14}"
+        )
+        for page in options["pages"]:
+            request = Request(
+                factory.get("/api/recipes/", {"page": page, "limit": limit})
+            )
+            number_time = timeit.timeit(
+                lambda: CustomPageNumberPagination().paginate_queryset(
+                    queryset, request
+                ),
+                number=number,
+            )
+            params = {"pagination": "cursor", "limit": limit}
+            if page > 1:
+                boundary = queryset.order_by(*ordering)[
+                    (page - 1) * limit - 1
+                ]
+                paginator = KeysetPagination(ordering)
+                params["cursor"] = paginator.encode_cursor(
+                    False, paginator.get_position(boundary)
+                )
+            request = Request(factory.get("/api/recipes/", params))
+            cursor_time = timeit.timeit(
+                lambda: KeysetPagination(ordering).paginate_queryset(
+                    queryset, request
+                ),
+                number=number,
+            )
+            self.stdout.write(
+                f"{page:>8}"
+                f"{number_time / number * 1000:>18.2f}"
+                f"{cursor_time / number * 1000:>14.2f}"
+            )
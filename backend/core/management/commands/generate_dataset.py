@@ -0,0 +1,381 @@
+import io
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from core.management.commands.reconcile_counters import (RECIPE_COUNTERS,
+                                                         USER_COUNTERS,
+                                                         count_rows)
+from core.signals import RECIPES_SCOPE, USERS_SCOPE, bump
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from PIL import Image
+from recipes.models import (FavouriteRecipe, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from users.models import Follow, UserStats
+
+User = get_user_model()
+
+IMAGE_NAME: str = "foodgram_backend/images/generated.jpg"
+PASSWORD: str = "generated-password"
+DEFAULT_TAGS: tuple = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+)
+DISHES: tuple = (
+    "Салат", "Суп", "Рагу", "Запеканка", "Пирог", "Каша", "Омлет",
+    "Паста", "Плов", "Котлеты", "Смузи", "Оладьи", "Соус", "Гратен",
+)
+STEPS: tuple = (
+    "Подготовьте и вымойте продукты.",
+    "Нарежьте ингредиенты небольшими кусочками.",
+    "Разогрейте сковороду с маслом.",
+    "Тушите под крышкой до готовности.",
+    "Запекайте в разогретой духовке.",
+    "Посолите и поперчите по вкусу.",
+    "Перемешайте и дайте настояться.",
+    "Подавайте горячим, украсив зеленью.",
+)
+PUB_DATE_SQL: str = (
+    "UPDATE {table} SET pub_date = data.pub_date "
+    "FROM unnest(%s::bigint[], %s::timestamptz[]) AS data(id, pub_date) "
+    "WHERE {table}.id = data.id"
+)
+INSERT_SQL: str = (
+    "INSERT INTO {table} ({columns}) SELECT * FROM unnest({arrays}) "
+    "ON CONFLICT DO NOTHING"
+)
+PUB_DATE_SPREAD: timedelta = timedelta(days=365 * 2)
+
+context: dict = {}
+
+
+def skewed_choice(rng: random.Random, items: list, skew: float):
+    """Return an item, the first items are chosen more often."""
+    return items[int(len(items) * rng.random() ** skew)]
+
+
+def insert_rows(model, fields: tuple, rows: list) -> None:
+    """Insert rows with a single statement, skip conflicting ones.
+
+    Rows are passed as one array per column, so no model instances
+    are built and the statement size does not grow with the batch.
+    """
+    if not rows:
+        return
+    fields = [model._meta.get_field(name) for name in fields]
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            INSERT_SQL.format(
+                table=quote_name(model._meta.db_table),
+                columns=columns,
+                arrays=", ".join(
+                    f"%s::{field.db_type(connection)}[]" for field in fields
+                ),
+            ),
+            [list(column) for column in zip(*rows)],
+        )
+
+
+def init_worker(worker_context: dict) -> None:
+    """Keep dataset context in the worker process."""
+    context.update(worker_context)
+
+
+def generate_recipes(task: tuple) -> int:
+    """Create a batch of recipes with ingredients and tags."""
+    index, count = task
+    rng = random.Random(f"{context['seed']}:recipes:{index}")
+    author_ids, tag_ids = context["author_ids"], context["tag_ids"]
+    ingredients = context["ingredients"]
+    recipes, pub_dates, compositions = [], [], []
+    for _ in range(count):
+        composition = {
+            skewed_choice(rng, ingredients, 2): rng.randint(1, 500)
+            for _ in range(rng.randint(3, 12))
+        }
+        main_ingredient = next(iter(composition))[1]
+        recipes.append(
+            Recipe(
+                author_id=skewed_choice(rng, author_ids, 3),
+                name=f"{rng.choice(DISHES)}: {main_ingredient}"[:100],
+                text=" ".join(rng.sample(STEPS, rng.randint(3, 6))),
+                cooking_time=max(1, int(rng.lognormvariate(3.3, 0.6))),
+                image=IMAGE_NAME,
+            )
+        )
+        pub_dates.append(
+            context["now"] - PUB_DATE_SPREAD * rng.random() ** 2
+        )
+        compositions.append(composition)
+    with transaction.atomic():
+        recipes = Recipe.objects.bulk_create(recipes)
+        ids = [recipe.pk for recipe in recipes]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                PUB_DATE_SQL.format(
+                    table=connection.ops.quote_name(Recipe._meta.db_table)
+                ),
+                (ids, pub_dates),
+            )
+        insert_rows(
+            RecipeIngredient,
+            ("recipe", "ingredient", "amount"),
+            [
+                (recipe_id, ingredient[0], amount)
+                for recipe_id, composition in zip(ids, compositions)
+                for ingredient, amount in composition.items()
+            ],
+        )
+        insert_rows(
+            Recipe.tags.through,
+            ("recipe", "tag"),
+            [
+                (recipe_id, tag_id)
+                for recipe_id in ids
+                for tag_id in rng.sample(
+                    tag_ids, rng.randint(1, len(tag_ids))
+                )
+            ],
+        )
+        Recipe.objects.filter(pk__in=ids).update_search_vector()
+    return len(ids)
+
+
+def generate_activity(task: tuple) -> int:
+    """Create favourites, carts and follows of a batch of users."""
+    index, user_ids = task
+    rng = random.Random(f"{context['seed']}:activity:{index}")
+    recipe_ids, author_ids = context["recipe_ids"], context["author_ids"]
+    celebrities = author_ids[:context["celebrities"]]
+    favourites, carts, follows = [], [], []
+    for user_id in user_ids:
+        for recipe_id in {
+            skewed_choice(rng, recipe_ids, 3)
+            for _ in range(int(rng.expovariate(1 / context["favorites"])))
+        }:
+            favourites.append((user_id, recipe_id))
+        for recipe_id in {
+            skewed_choice(rng, recipe_ids, 2)
+            for _ in range(rng.randint(0, int(2 * context["carts"])))
+        }:
+            carts.append((user_id, recipe_id))
+        authors = set()
+        for _ in range(int(rng.expovariate(1 / context["follows"]))):
+            if celebrities and rng.random() < context["celebrity_share"]:
+                authors.add(rng.choice(celebrities))
+            else:
+                authors.add(skewed_choice(rng, author_ids, 2))
+        authors.discard(user_id)
+        follows.extend((user_id, author_id) for author_id in authors)
+    with transaction.atomic():
+        insert_rows(
+            FavouriteRecipe,
+            ("user", "recipe", "date_added"),
+            [row + (context["now"],) for row in favourites],
+        )
+        insert_rows(ShoppingCart, ("user", "recipe"), carts)
+        insert_rows(Follow, ("user", "author"), follows)
+    return len(favourites) + len(carts) + len(follows)
+
+
+class Command(BaseCommand):
+    """Generate a reproducible synthetic dataset for load tests."""
+    help: str = (
+        "Generate seeded users, recipes, favourites, shopping carts "
+        "and a skewed follow graph with bulk inserts"
+    )
+
+    def add_arguments(self, parser) -> None:
+        """Add dataset size, seed and parallelism arguments."""
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument(
+            "--favorites",
+            type=float,
+            default=20,
+            help="Mean number of favourites per user",
+        )
+        parser.add_argument(
+            "--carts",
+            type=float,
+            default=2,
+            help="Mean number of recipes in a shopping cart",
+        )
+        parser.add_argument(
+            "--follows",
+            type=float,
+            default=10,
+            help="Mean number of subscriptions per user",
+        )
+        parser.add_argument(
+            "--celebrities",
+            type=int,
+            default=10,
+            help="Number of authors receiving a large share of follows",
+        )
+        parser.add_argument("--celebrity-share", type=float, default=0.5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="generated")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes inserting batches, 1 runs in this process",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Create users, recipes and activity, then derived data."""
+        started = time.perf_counter()
+        ingredients = list(
+            Ingredient.objects.order_by("pk").values_list("pk", "name")
+        )
+        if not ingredients:
+            raise CommandError(
+                "No ingredients, import them with write_from_csv_to_db"
+            )
+        rng = random.Random(options["seed"])
+        rng.shuffle(ingredients)
+        if not default_storage.exists(IMAGE_NAME):
+            buffer = io.BytesIO()
+            Image.new("RGB", (480, 480), "#E26C2D").save(buffer, "JPEG")
+            default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+        user_ids = self.create_users(options)
+        worker_context = {
+            "seed": options["seed"],
+            "now": timezone.now(),
+            "author_ids": user_ids,
+            "tag_ids": self.get_tag_ids(),
+            "ingredients": ingredients,
+            "favorites": options["favorites"],
+            "carts": options["carts"],
+            "follows": options["follows"],
+            "celebrities": options["celebrities"],
+            "celebrity_share": options["celebrity_share"],
+        }
+        batch_size = options["batch_size"]
+        recipes = self.run(
+            generate_recipes,
+            (
+                (index, min(batch_size, options["recipes"] - start))
+                for index, start in enumerate(
+                    range(0, options["recipes"], batch_size)
+                )
+            ),
+            worker_context,
+            options["workers"],
+        )
+        worker_context["recipe_ids"] = list(
+            Recipe.objects.filter(
+                author__gte=user_ids[0], author__lte=user_ids[-1]
+            )
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        rng.shuffle(worker_context["recipe_ids"])
+        activity = self.run(
+            generate_activity,
+            (
+                (index, user_ids[start:start + batch_size])
+                for index, start in enumerate(
+                    range(0, len(user_ids), batch_size)
+                )
+            ),
+            worker_context,
+            options["workers"],
+        )
+        call_command("rebuild_shopping_lists", stdout=self.stdout)
+        UserStats.objects.bulk_create(
+            (UserStats(user_id=user_id) for user_id in user_ids),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        self.set_counters(
+            Recipe.objects,
+            RECIPE_COUNTERS,
+            worker_context["recipe_ids"],
+            batch_size,
+        )
+        self.set_counters(
+            UserStats.objects, USER_COUNTERS, user_ids, batch_size
+        )
+        bump(RECIPES_SCOPE, USERS_SCOPE)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated users: {len(user_ids)}, recipes: {recipes}, "
+                f"favourites, carts and follows: {activity} "
+                f"in {time.perf_counter() - started:.1f} s"
+            )
+        )
+
+    @staticmethod
+    def create_users(options: dict) -> list:
+        """Create users with one shared password hash."""
+        password = make_password(PASSWORD)
+        prefix, batch_size = options["prefix"], options["batch_size"]
+        user_ids = []
+        for start in range(0, options["users"], batch_size):
+            users = User.objects.bulk_create(
+                User(
+                    username=f"{prefix}_{index}",
+                    email=f"{prefix}_{index}@example.com",
+                    first_name=f"Имя{index}",
+                    last_name=f"Фамилия{index}",
+                    password=password,
+                )
+                for index in range(
+                    start, min(start + batch_size, options["users"])
+                )
+            )
+            user_ids.extend(user.pk for user in users)
+        return user_ids
+
+    @staticmethod
+    def set_counters(
+        queryset, counters: dict, pks: list, batch_size: int
+    ) -> None:
+        """Count rows inserted for the new objects into their counters.
+
+        The objects were created by this run, so nothing was cached
+        or versioned for them and no version has to be bumped.
+        """
+        actual = count_rows(counters)
+        for start in range(0, len(pks), batch_size):
+            queryset.filter(pk__in=pks[start:start + batch_size]).update(
+                **actual
+            )
+
+    @staticmethod
+    def get_tag_ids() -> list:
+        """Return ids of tags, create default ones if there are none."""
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            )
+        return list(Tag.objects.order_by("pk").values_list("pk", flat=True))
+
+    @staticmethod
+    def run(function, tasks, worker_context: dict, workers: int) -> int:
+        """Run tasks in this process or in a process pool."""
+        if workers <= 1:
+            init_worker(worker_context)
+            return sum(map(function, tasks))
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(worker_context,),
+        ) as pool:
+            return sum(pool.map(function, tasks))
@@ -0,0 +1,109 @@
+import http.client
+import statistics
+import threading
+import time
+from itertools import cycle, islice
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS: tuple = (
+    "/api/recipes/",
+    "/api/recipes/?page=2",
+    "/api/tags/",
+    "/api/ingredients/?name=сах",
+    "/api/users/",
+)
+
+
+class Command(BaseCommand):
+    """Measure throughput of a running server with keep-alive clients."""
+    help: str = (
+        "Request paths of a running server from concurrent keep-alive "
+        "clients for a fixed time, print requests per second and latency"
+    )
+
+    def add_arguments(self, parser) -> None:
+        """Add server, paths, concurrency and duration arguments."""
+        parser.add_argument("url", nargs="?", default="http://127.0.0.1:8080")
+        parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=20)
+        parser.add_argument("--warmup", type=float, default=2)
+        parser.add_argument(
+            "--token", help="API token, authenticated requests skip caches"
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Run clients in threads and print the summary."""
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Only http://host[:port] URLs are supported")
+        headers = {"Connection": "keep-alive"}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+        self.lock = threading.Lock()
+        self.timings, self.errors = [], []
+        measure_from = time.perf_counter() + options["warmup"]
+        deadline = measure_from + options["duration"]
+        paths = [quote(path, safe="/?=&%") for path in options["paths"]]
+        # Clients start at different paths, so every path is loaded
+        # evenly from the first second.
+        clients = [
+            threading.Thread(
+                target=self.run_client,
+                args=(
+                    url,
+                    headers,
+                    islice(cycle(paths), index, None),
+                    measure_from,
+                    deadline,
+                ),
+            )
+            for index in range(options["concurrency"])
+        ]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        if len(self.timings) < 2:
+            raise CommandError(f"No successful requests: {self.errors}")
+        percentiles = statistics.quantiles(
+            [timing * 1000 for timing in self.timings], n=100
+        )
+        self.stdout.write(
+            f"concurrency: {options['concurrency']}, "
+            f"requests: {len(self.timings)}, errors: {len(self.errors)}\n"
+            f"rps: {len(self.timings) / options['duration']:.1f}, "
+            f"p50: {percentiles[49]:.1f} ms, p95: {percentiles[94]:.1f} ms, "
+            f"p99: {percentiles[98]:.1f} ms"
+        )
+
+    def run_client(
+        self, url, headers: dict, paths, measure_from: float, deadline: float
+    ) -> None:
+        """Send requests over one connection until the deadline."""
+        connection = None
+        while time.perf_counter() < deadline:
+            if connection is None:
+                connection = http.client.HTTPConnection(
+                    url.hostname, url.port or 80, timeout=30
+                )
+            started = time.perf_counter()
+            try:
+                connection.request("GET", next(paths), headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as error:
+                connection.close()
+                connection = None
+                status = type(error).__name__
+            elapsed = time.perf_counter() - started
+            if started < measure_from:
+                continue
+            with self.lock:
+                if status == 200:
+                    self.timings.append(elapsed)
+                else:
+                    self.errors.append(status)
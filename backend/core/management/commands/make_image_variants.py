@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from recipes.images import SOURCE_KEY, make_variants
+from recipes.models import Recipe
+
+
+def make_recipe_variants(item: tuple) -> tuple:
+    """Make image variants of a recipe in a worker process."""
+    pk, name = item
+    try:
+        return pk, make_variants(name)
+    except OSError as error:
+        return pk, str(error)
+
+
+class Command(BaseCommand):
+    """Make resized variants for existing recipe images."""
+    help: str = "Make resized image variants of recipes in a process pool"
+
+    def add_arguments(self, parser) -> None:
+        """Add workers, batch size and force arguments."""
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Remake variants which are already up to date",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Send images without variants to workers, save results."""
+        items = [
+            (pk, image)
+            for pk, image, variants in Recipe.objects.order_by(
+                "pk"
+            ).values_list("pk", "image", "image_variants")
+            if image
+            and (options["force"] or variants.get(SOURCE_KEY) != image)
+        ]
+        connections.close_all()
+        done, failed = 0, 0
+        batch_size = options["batch_size"]
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            for start in range(0, len(items), batch_size):
+                recipes = []
+                for pk, variants in pool.map(
+                    make_recipe_variants,
+                    items[start:start + batch_size],
+                    chunksize=16,
+                ):
+                    if isinstance(variants, str):
+                        failed += 1
+                        self.stderr.write(f"Recipe {pk}: {variants}")
+                        continue
+                    recipes.append(Recipe(pk=pk, image_variants=variants))
+                Recipe.objects.bulk_update(recipes, ("image_variants",))
+                done += len(recipes)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Made image variants: {done}, failed: {failed}"
+            )
+        )
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recipes.models import ShoppingCart, ShoppingListItem
+
+
+class Command(BaseCommand):
+    """Rebuild or verify shopping list totals from shopping carts."""
+    help: str = (
+        "Rebuild shopping list totals from shopping carts and recipes, "
+        "with --verify only report mismatches"
+    )
+
+    def add_arguments(self, parser) -> None:
+        """Add verify and batch size arguments."""
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare totals with source data",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        """Process users with shopping list data in batches."""
+        user_ids = sorted(
+            set(ShoppingCart.objects.values_list("user_id", flat=True))
+            | set(ShoppingListItem.objects.values_list("user_id", flat=True))
+        )
+        batch_size = options["batch_size"]
+        mismatched_users = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            with transaction.atomic():
+                mismatched_users += self.process_batch(
+                    batch, options["verify"]
+                )
+        if options["verify"] and mismatched_users:
+            raise CommandError(
+                f"Shopping list totals differ for {mismatched_users} users"
+            )
+        action = "Verified" if options["verify"] else "Rebuilt"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} shopping lists of {len(user_ids)} users, "
+                f"mismatched: {mismatched_users}"
+            )
+        )
+
+    def process_batch(self, user_ids: list, verify: bool) -> int:
+        """Compare totals of users, rewrite them unless verifying."""
+        expected = ShoppingListItem.objects.calculate(user_ids)
+        items = ShoppingListItem.objects.select_for_update().filter(
+            user_id__in=user_ids
+        )
+        actual = {
+            (item.user_id, item.ingredient_id): item.total_amount
+            for item in items
+        }
+        mismatched = {
+            user_id
+            for user_id, ingredient_id in expected.keys() | actual.keys()
+            if expected.get((user_id, ingredient_id))
+            != actual.get((user_id, ingredient_id))
+        }
+        if verify:
+            for user_id in sorted(mismatched):
+                self.stdout.write(f"Mismatch for user {user_id}")
+        elif mismatched:
+            ShoppingListItem.objects.filter(user_id__in=mismatched).delete()
+            ShoppingListItem.objects.bulk_create(
+                ShoppingListItem(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=total_amount,
+                )
+                for (user_id, ingredient_id), total_amount in expected.items()
+                if user_id in mismatched
+            )
+        return len(mismatched)
@@ -0,0 +1,141 @@
+from functools import reduce
+from operator import or_
+
+from core.signals import RECIPE_SCOPE, bump
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import FavouriteRecipe, Recipe, ShoppingCart
+from users.models import Follow, UserStats
+
+User = get_user_model()
+
+RECIPE_COUNTERS: dict = {
+    "favorites_count": (FavouriteRecipe, "recipe_id"),
+    "in_carts_count": (ShoppingCart, "recipe_id"),
+}
+USER_COUNTERS: dict = {
+    "recipes_count": (Recipe, "author_id"),
+    "followers_count": (Follow, "author_id"),
+}
+
+
+def count_rows(counters: dict) -> dict:
+    """Return expressions counting source rows of the counters."""
+    return {
+        field: Coalesce(
+            Subquery(
+                model.objects.filter(**{key: OuterRef("pk")})
+                .order_by()
+                .values(key)
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+        for field, (model, key) in counters.items()
+    }
+
+
+class Command(BaseCommand):
+    """Recount denormalised recipe and user counters."""
+    help: str = (
+        "Recount favourites, shopping carts, recipes and followers "
+        "counters in batches, with --verify only report drift"
+    )
+
+    def add_arguments(self, parser) -> None:
+        """Add verify and batch size arguments."""
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare counters with source data",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        """Reconcile recipe counters, then user counters."""
+        verify, batch_size = options["verify"], options["batch_size"]
+        if not verify:
+            self.create_missing_stats(batch_size)
+        drifted_recipes = self.reconcile(
+            Recipe.objects, RECIPE_COUNTERS, batch_size, verify
+        )
+        if not verify:
+            for start in range(0, len(drifted_recipes), batch_size):
+                bump(
+                    *(
+                        RECIPE_SCOPE.format(recipe_id=pk)
+                        for pk in drifted_recipes[start:start + batch_size]
+                    )
+                )
+        drifted = len(drifted_recipes) + len(
+            self.reconcile(
+                UserStats.objects, USER_COUNTERS, batch_size, verify
+            )
+        )
+        if verify and drifted:
+            raise CommandError(f"Counters differ for {drifted} objects")
+        action = "Verified" if verify else "Reconciled"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} counters, drifted: {drifted}")
+        )
+
+    @staticmethod
+    def create_missing_stats(batch_size: int) -> None:
+        """Create counters of users which have none."""
+        user_ids = list(
+            User.objects.filter(stats__isnull=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        for start in range(0, len(user_ids), batch_size):
+            UserStats.objects.bulk_create(
+                (
+                    UserStats(user_id=user_id)
+                    for user_id in user_ids[start:start + batch_size]
+                ),
+                ignore_conflicts=True,
+            )
+
+    def reconcile(
+        self, queryset, counters: dict, batch_size: int, verify: bool
+    ) -> list:
+        """Compare counters with source rows, fix them unless verifying.
+
+        Both the comparison and the fix are single statements per batch
+        with correlated counts, so no objects are loaded. Return primary
+        keys of drifted objects.
+        """
+        actual = count_rows(counters)
+        differs = reduce(
+            or_, (~Q(**{field: F(f"actual_{field}")}) for field in counters)
+        )
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+        drifted = []
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start:start + batch_size]
+            with transaction.atomic():
+                changed = list(
+                    queryset.select_for_update()
+                    .filter(pk__in=batch)
+                    .alias(
+                        **{
+                            f"actual_{field}": expression
+                            for field, expression in actual.items()
+                        }
+                    )
+                    .filter(differs)
+                    .values_list("pk", flat=True)
+                )
+                if verify:
+                    for pk in changed:
+                        self.stdout.write(
+                            f"Drift in {queryset.model._meta.model_name} {pk}"
+                        )
+                elif changed:
+                    queryset.filter(pk__in=changed).update(**actual)
+                drifted.extend(changed)
+        return drifted
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Rebuild full-text search vectors of existing recipes."""
+    help: str = "Rebuild full-text search vectors of recipes in batches"
+
+    def add_arguments(self, parser) -> None:
+        """Add batch size argument."""
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options) -> None:
+        """Update recipes ordered by pk in batches."""
+        batch_size = options["batch_size"]
+        last_pk, updated = 0, 0
+        while True:
+            pks = list(
+                Recipe.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                updated += Recipe.objects.filter(
+                    pk__in=pks
+                ).update_search_vector()
+            last_pk = pks[-1]
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated search vectors: {updated}")
+        )
@@ -1,36 +1,171 @@
 import csv
+import json
 import os
+import time
+from itertools import islice
 
-from django.contrib.auth import get_user_model
+from core.signals import INGREDIENTS_SCOPE, bump
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.db.utils import IntegrityError
-from recipes.models import Ingredient
+from django.db import connection, transaction
+from recipes.models import NAME_MAX_VALUE, Ingredient
 
-User = get_user_model()
+DEFAULT_PATH: str = str(settings.BASE_DIR / "data" / "ingredients.csv")
+FORMATS: tuple = ("csv", "json")
+JSON_CHUNK_SIZE: int = 64 * 1024
+JSON_WHITESPACE: str = " \t\r\n"
+INSERT_SQL: str = (
+    "INSERT INTO {table} (name, measurement_unit) "
+    "SELECT * FROM unnest(%s::text[], %s::text[]) "
+    "ON CONFLICT (name, measurement_unit) DO NOTHING"
+)
+
+
+def read_csv(file):
+    """Yield line numbers and (name, measurement unit) rows of CSV."""
+    reader = csv.reader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def start_json(file) -> tuple:
+    """Return the first chunks of JSON and whether it is an array.
+
+    A top-level array starts with "[" followed by anything but a
+    string, while a row of JSON lines may be a [name, unit] pair.
+    """
+    buffer = ""
+    while True:
+        chunk = file.read(JSON_CHUNK_SIZE)
+        buffer += chunk
+        start = buffer.lstrip(JSON_WHITESPACE)
+        if not chunk or start[:1] not in ("", "[") or start[1:].strip():
+            break
+    item = start[1:].lstrip(JSON_WHITESPACE)
+    if start.startswith("[") and not item.startswith('"'):
+        return item, True
+    return start, False
+
+
+def read_json(file):
+    """Yield item numbers and rows of a JSON array or JSON lines.
+
+    Items are decoded one by one from a buffer filled by chunks,
+    so the file is never loaded into memory whole. Only brackets and
+    commas of the top-level array are skipped between items.
+    """
+    decoder = json.JSONDecoder()
+    buffer, is_array = start_json(file)
+    separators = JSON_WHITESPACE + "," if is_array else JSON_WHITESPACE
+    position, eof, number = 0, False, 0
+    while True:
+        while position < len(buffer) and buffer[position] in separators:
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = file.read(JSON_CHUNK_SIZE), 0
+            eof = not buffer
+            continue
+        if is_array and buffer[position] == "]":
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            if eof:
+                raise CommandError(f"Invalid JSON: {error}")
+            chunk = file.read(JSON_CHUNK_SIZE)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        number += 1
+        if isinstance(item, dict):
+            item = (item.get("name"), item.get("measurement_unit"))
+        yield number, item
+
+
+def clean_row(row) -> tuple:
+    """Return stripped name and measurement unit or None if invalid."""
+    if not isinstance(row, (list, tuple)) or len(row) != 2:
+        return None
+    if not all(isinstance(value, str) for value in row):
+        return None
+    name, measurement_unit = (value.strip() for value in row)
+    if not name or not measurement_unit:
+        return None
+    if max(len(name), len(measurement_unit)) > NAME_MAX_VALUE:
+        return None
+    return name, measurement_unit
+
+
+def insert_batch(rows: list) -> int:
+    """Insert new ingredients of the batch, return inserted count."""
+    names, measurement_units = zip(*rows)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            INSERT_SQL.format(
+                table=connection.ops.quote_name(Ingredient._meta.db_table)
+            ),
+            (list(names), list(measurement_units)),
+        )
+        return cursor.rowcount
 
 
 class Command(BaseCommand):
-    """Custom command for reading csv file and saving data to database."""
+    """Import ingredients from CSV or JSON skipping existing ones."""
     help: str = (
-        'Read csv files in "static/data" folder and write them to database',
+        "Import ingredients from a CSV or JSON file in batches, "
+        "existing ingredients are skipped"
     )
 
-    def handle(self, *args, **options) -> None:
-        """Try to csv_to_db and stdout success text.
+    def add_arguments(self, parser) -> None:
+        """Add path, format and batch size arguments."""
+        parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format, by default taken from the extension",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
 
-        Raise exception if false.
-        """
+    def handle(self, *args, **options) -> None:
+        """Stream rows, insert valid ones batch by batch, print stats."""
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1][1:]
+        if file_format not in FORMATS:
+            raise CommandError(f"Unknown format of {path}, use --format")
+        read = read_csv if file_format == "csv" else read_json
+        verbosity = options["verbosity"]
+        inserted, total, invalid = 0, 0, 0
+        started = time.perf_counter()
         try:
-            csv_to_db(Ingredient, "ingredients.csv")
-        except IntegrityError as error:
+            with open(path, encoding="utf-8", newline="") as file:
+                rows = read(file)
+                batch_size = options["batch_size"]
+                for chunk in iter(lambda: list(islice(rows, batch_size)), []):
+                    batch = []
+                    for number, row in chunk:
+                        row = clean_row(row)
+                        if row is None:
+                            invalid += 1
+                            if verbosity > 1:
+                                self.stderr.write(f"Invalid row {number}")
+                            continue
+                        batch.append(row)
+                    total += len(chunk)
+                    if batch:
+                        with transaction.atomic():
+                            inserted += insert_batch(batch)
+        except OSError as error:
             raise CommandError(error)
-
-        self.stdout.write(self.style.SUCCESS("Successfully write to db"))
-
-
-def csv_to_db(model: Ingredient, filename: str) -> None:
-    """Read a csv file and create a new entry in database."""
-    file_path: str = os.path.abspath(f"data/{filename}")
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line in csv.reader(f):
-            model.objects.get_or_create(name=line[0], measurement_unit=line[1])
+        finally:
+            if inserted:
+                bump(INGREDIENTS_SCOPE)
+        elapsed = time.perf_counter() - started
+        skipped = total - invalid - inserted
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Inserted: {inserted}, skipped: {skipped}, "
+                f"invalid: {invalid}, {total / elapsed:.0f} rows/s"
+            )
+        )
@@ -0,0 +1,249 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+LATENCY_BUCKETS: tuple = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+METRICS: dict = {
+    "foodgram_http_requests_total": (
+        "counter",
+        "Requests by view, method and status.",
+    ),
+    "foodgram_http_request_duration_seconds": (
+        "histogram",
+        "Request latency by view and method.",
+    ),
+    "foodgram_db_duration_seconds_total": (
+        "counter",
+        "Time spent in database queries by view and method.",
+    ),
+    "foodgram_db_queries_total": (
+        "counter",
+        "Database queries by view and method.",
+    ),
+}
+
+
+class DatabaseTimer:
+    """Execute wrapper summing time and number of queries."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def add(current, value):
+    """Return sum of samples, histogram samples are added by element."""
+    if current is None:
+        return list(value) if isinstance(value, list) else value
+    if isinstance(value, list):
+        return [a + b for a, b in zip(current, value)]
+    return current + value
+
+
+def merge(target: dict, source: dict) -> dict:
+    """Add samples dumped from another state to target, return it."""
+    for kind, samples in source.items():
+        for key, value in samples:
+            key = tuple(map(tuple, key))
+            target[kind][key] = add(target[kind].get(key), value)
+    return target
+
+
+def dump(state: dict) -> dict:
+    """Return state with JSON serialisable keys."""
+    return {
+        kind: [[list(map(list, key)), value] for key, value in samples.items()]
+        for kind, samples in state.items()
+    }
+
+
+def empty_state() -> dict:
+    """Return state without samples."""
+    return {"counters": {}, "histograms": {}}
+
+
+def escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(labels, **extra) -> str:
+    """Return labels in braces."""
+    pairs = [*labels, *extra.items()]
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+
+def render(state: dict) -> str:
+    """Render state in the Prometheus text exposition format."""
+    samples = defaultdict(list)
+    for ((_, name), *labels), value in sorted(state["counters"].items()):
+        samples[name].append(f"{name}{format_labels(labels)} {value}")
+    for ((_, name), *labels), value in sorted(
+        state["histograms"].items()
+    ):
+        *buckets, total, count = value
+        cumulative = 0
+        for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+            cumulative += bucket
+            samples[name].append(
+                f"{name}_bucket{format_labels(labels, le=bound)} "
+                f"{cumulative}"
+            )
+        samples[name].append(
+            f"{name}_bucket{format_labels(labels, le='+Inf')} {count}"
+        )
+        samples[name].append(f"{name}_sum{format_labels(labels)} {total}")
+        samples[name].append(f"{name}_count{format_labels(labels)} {count}")
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples[name])
+    return "\n".join(lines) + "\n"
+
+
+class MetricsRegistry:
+    """Metrics of this process, shared with other workers via files.
+
+    With `METRICS_DIR` set every process writes its totals to its own
+    JSON file at most every `METRICS_FLUSH_INTERVAL` seconds and the
+    exposition merges all files. Files of stopped workers stay, so
+    totals never decrease, and a new process reusing a PID continues
+    from the totals in its file.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.state = empty_state()
+        self.pid = None
+        self.flushed = 0.0
+
+    def reset(self) -> None:
+        """Start from the totals left in this PID's file."""
+        self.state = empty_state()
+        self.pid = os.getpid()
+        self.flushed = time.monotonic()
+        path = self.get_path()
+        if path is None:
+            return
+        try:
+            with open(path, encoding="utf-8") as file:
+                merge(self.state, json.load(file))
+        except (OSError, ValueError):
+            self.state = empty_state()
+
+    def get_path(self) -> str:
+        """Return this process's file or None without METRICS_DIR."""
+        if not settings.METRICS_DIR:
+            return None
+        return os.path.join(settings.METRICS_DIR, f"{os.getpid()}.json")
+
+    def observe(
+        self,
+        view: str,
+        method: str,
+        status: int,
+        duration: float,
+        timer: DatabaseTimer,
+    ) -> None:
+        """Record a finished request, flush to the file when due."""
+        labels = (("view", view), ("method", method))
+        buckets = [0] * len(LATENCY_BUCKETS)
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        if bucket < len(buckets):
+            buckets[bucket] = 1
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            for kind, name, extra, value in (
+                (
+                    "counters",
+                    "foodgram_http_requests_total",
+                    (("status", str(status)),),
+                    1,
+                ),
+                (
+                    "counters",
+                    "foodgram_db_duration_seconds_total",
+                    (),
+                    timer.duration,
+                ),
+                ("counters", "foodgram_db_queries_total", (), timer.count),
+                (
+                    "histograms",
+                    "foodgram_http_request_duration_seconds",
+                    (),
+                    [*buckets, duration, 1],
+                ),
+            ):
+                key = (("__name__", name), *labels, *extra)
+                self.state[kind][key] = add(self.state[kind].get(key), value)
+            due = (
+                time.monotonic() - self.flushed
+                >= settings.METRICS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write totals of this process to its file atomically."""
+        path = self.get_path()
+        if path is None or self.pid != os.getpid():
+            return
+        with self.lock:
+            data = json.dumps(dump(self.state))
+            self.flushed = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+    def collect(self) -> dict:
+        """Return totals of all processes."""
+        if not settings.METRICS_DIR:
+            with self.lock:
+                return merge(empty_state(), dump(self.state))
+        self.flush()
+        state = empty_state()
+        try:
+            names = os.listdir(settings.METRICS_DIR)
+        except FileNotFoundError:
+            names = ()
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(
+                    os.path.join(settings.METRICS_DIR, name),
+                    encoding="utf-8",
+                ) as file:
+                    merge(state, json.load(file))
+            except (OSError, ValueError):
+                continue
+        return state
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush)
@@ -0,0 +1,202 @@
+import cProfile
+import heapq
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import profiling
+from .metrics import DatabaseTimer, registry
+
+logger = logging.getLogger(__name__)
+
+SQL_PREVIEW_LENGTH: int = 300
+ORIGIN_DEPTH: int = 3
+
+
+def get_origin() -> str:
+    """Return innermost project frames outside of this module."""
+    base_dir = str(settings.BASE_DIR)
+    frames = []
+    frame = sys._getframe(1)
+    while frame is not None and len(frames) < ORIGIN_DEPTH:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base_dir)
+            and filename != __file__
+            and f"{os.sep}site-packages{os.sep}" not in filename
+        ):
+            frames.append(
+                f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} "
+                f"in {frame.f_code.co_name}"
+            )
+        frame = frame.f_back
+    return " < ".join(frames) or "unknown"
+
+
+class QueryRecorder:
+    """Execute wrapper collecting statements of a single request.
+
+    Statements are grouped by their SQL text with placeholders, which
+    is the same for queries differing only in parameters. Frames
+    that caused a group are looked up once, when the group reaches
+    the N+1 threshold, so the common path is a counter increment.
+    """
+
+    def __init__(self, threshold: int) -> None:
+        self.threshold = threshold
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+        self.shapes = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            self.statements.append((duration, sql))
+            self.shapes[sql] += 1
+            if self.shapes[sql] == self.threshold:
+                self.origins[sql] = get_origin()
+
+    def get_slowest(self, number: int) -> list:
+        """Return the slowest statements with their duration in ms."""
+        return [
+            {"ms": round(duration * 1000, 2), "sql": sql[:SQL_PREVIEW_LENGTH]}
+            for duration, sql in heapq.nlargest(
+                number, self.statements, key=lambda statement: statement[0]
+            )
+        ]
+
+    def get_repeated(self) -> list:
+        """Return query shapes repeated at least threshold times."""
+        return [
+            {
+                "count": self.shapes[sql],
+                "sql": sql[:SQL_PREVIEW_LENGTH],
+                "origin": origin,
+            }
+            for sql, origin in self.origins.items()
+        ]
+
+
+class QueryInstrumentationMiddleware:
+    """Record SQL of sampled requests, report it in headers and logs.
+
+    Logs one JSON line per sampled request with the slowest statements
+    and likely N+1 queries, requests with likely N+1 queries are logged
+    as warnings. Responses to staff also get `Server-Timing` with
+    database and total time, other clients do not see query counts.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.sample_rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        self.threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+        self.slowest = settings.SQL_SLOWEST_STATEMENTS
+
+    def __call__(self, request):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return self.get_response(request)
+        recorder = QueryRecorder(self.threshold)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        if profiling.is_staff(request):
+            response["Server-Timing"] = (
+                f'db;dur={recorder.duration * 1000:.1f};'
+                f'desc="{recorder.count} queries", '
+                f"total;dur={total * 1000:.1f}"
+            )
+        repeated = recorder.get_repeated()
+        logger.log(
+            logging.WARNING if repeated else logging.INFO,
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "queries": recorder.count,
+                    "db_ms": round(recorder.duration * 1000, 2),
+                    "total_ms": round(total * 1000, 2),
+                    "slowest": recorder.get_slowest(self.slowest),
+                    "n_plus_one": repeated,
+                },
+                ensure_ascii=False,
+            ),
+        )
+        return response
+
+
+class MetricsMiddleware:
+    """Record latency, status and database time of every request.
+
+    Requests are labelled with the resolved view name, for API views
+    it includes the action, e.g. `api:recipe-list`.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = DatabaseTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        registry.observe(
+            getattr(request.resolver_match, "view_name", None) or "unmatched",
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            timer,
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile requests of staff on demand and a sample of all requests.
+
+    Staff ask for a profile with the `X-Profile` header or the
+    `profile` query parameter, the saved profile name is returned in
+    `X-Profile-Id`. Profiles are listed and downloaded in the admin.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        requested = profiling.is_requested(request) and profiling.is_staff(
+            request
+        )
+        sampled = bool(self.sample_rate) and random.random() < self.sample_rate
+        if not requested and not sampled:
+            return self.get_response(request)
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+        name = profiling.save(profile, request, time.perf_counter() - started)
+        if requested:
+            response["X-Profile-Id"] = name
+        return response
@@ -0,0 +1,69 @@
+from django.db import connections, models, router
+from django.utils import timezone
+
+SCOPE_MAX_LENGTH: int = 64
+
+
+class VersionQuerySet(models.QuerySet):
+    """Custom queryset for data versions."""
+    def bump(self, *scopes: str) -> None:
+        """Increment versions of the scopes, creating missing ones.
+
+        All scopes are upserted with a single INSERT ... ON CONFLICT
+        statement in a fixed order, so concurrent bumps do not deadlock.
+        """
+        scopes = sorted(set(scopes))
+        if not scopes:
+            return
+        connection = connections[router.db_for_write(self.model)]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (scope, version, updated) VALUES "
+                + ", ".join(["(%s, 1, %s)"] * len(scopes))
+                + " ON CONFLICT (scope) DO UPDATE SET "
+                f"version = {table}.version + 1, updated = EXCLUDED.updated",
+                [value for scope in scopes for value in (scope, now)],
+            )
+
+    def get_validators(self, scopes: tuple) -> tuple:
+        """Return versions string and last modification of the scopes."""
+        versions = {
+            scope: (version, updated)
+            for scope, version, updated in self.filter(
+                scope__in=scopes
+            ).values_list("scope", "version", "updated")
+        }
+        last_modified = max(
+            (updated for _, updated in versions.values()), default=None
+        )
+        return (
+            ":".join(
+                str(versions.get(scope, (0,))[0]) for scope in scopes
+            ),
+            last_modified,
+        )
+
+
+class Version(models.Model):
+    """Version counter of a data scope used for conditional requests."""
+    scope: str = models.CharField(
+        verbose_name="Область данных",
+        max_length=SCOPE_MAX_LENGTH,
+        unique=True,
+    )
+    version: int = models.PositiveBigIntegerField(
+        verbose_name="Версия", default=0
+    )
+    updated = models.DateTimeField(verbose_name="Дата изменения")
+
+    objects = VersionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name: str = "Версия данных"
+        verbose_name_plural: str = "Версии данных"
+
+    def __str__(self) -> str:
+        """Return a string representation of scope and version."""
+        return f"{self.scope}: {self.version}"
@@ -0,0 +1,107 @@
+import io
+import os
+import pstats
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+PROFILE_HEADER: str = "X-Profile"
+PROFILE_PARAM: str = "profile"
+EXTENSION: str = ".prof"
+UNSAFE_CHARACTERS: re.Pattern = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def is_requested(request) -> bool:
+    """Return whether the request asks to be profiled."""
+    return bool(
+        request.headers.get(PROFILE_HEADER)
+        or request.GET.get(PROFILE_PARAM)
+    )
+
+
+def is_staff(request) -> bool:
+    """Return whether a session or an API token belongs to staff.
+
+    API tokens are checked with DRF authentication classes, which
+    otherwise run only inside the view, after profiling has started.
+    """
+    if request.user.is_authenticated:
+        return request.user.is_staff
+    drf_request = Request(
+        request,
+        authenticators=[
+            authentication()
+            for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    try:
+        return drf_request.user.is_staff
+    except APIException:
+        return False
+
+
+def save(profile, request, duration: float) -> str:
+    """Save profile in pstats format, drop the oldest over the cap."""
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    view = getattr(request.resolver_match, "view_name", None) or "unmatched"
+    name = UNSAFE_CHARACTERS.sub(
+        "_",
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{view}-"
+        f"{duration * 1000:.0f}ms-{uuid.uuid4().hex[:8]}",
+    )
+    profile.dump_stats(os.path.join(settings.PROFILING_DIR, name + EXTENSION))
+    for stale in list_profiles()[settings.PROFILING_MAX_FILES:]:
+        try:
+            os.remove(stale["path"])
+        except FileNotFoundError:
+            pass
+    return name + EXTENSION
+
+
+def list_profiles() -> list:
+    """Return saved profiles, newest first."""
+    try:
+        entries = list(os.scandir(settings.PROFILING_DIR))
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for entry in entries:
+        if not entry.name.endswith(EXTENSION):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        profiles.append(
+            {
+                "name": entry.name,
+                "path": entry.path,
+                "size": stat.st_size,
+                "created": datetime.fromtimestamp(
+                    stat.st_mtime, tz=timezone.utc
+                ),
+            }
+        )
+    return sorted(profiles, key=lambda profile: profile["created"])[::-1]
+
+
+def get_path(name: str) -> str:
+    """Return path of a saved profile or None for unknown names."""
+    if os.path.basename(name) != name or not name.endswith(EXTENSION):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def format_stats(path: str, limit: int = 60) -> str:
+    """Return the top of a profile sorted by cumulative time."""
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,117 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY: str = "response_cache:generation:{scope}"
+STATS_KEY: str = "response_cache:stats:{scope}:{name}"
+RESPONSE_KEY: str = "response_cache:{generations}:{digest}"
+COUNT_KEY: str = "response_cache:count:{generations}:{digest}"
+STATS_NAMES: tuple = ("hits", "misses")
+
+
+def get_cache():
+    """Return cache configured for responses."""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_generations(scopes: tuple) -> str:
+    """Return current generations of the scopes joined with colons.
+
+    A missing generation starts from the current time, so an evicted
+    counter never returns to a value used by older entries.
+    """
+    keys = [GENERATION_KEY.format(scope=scope) for scope in scopes]
+    cache = get_cache()
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return ":".join(str(generations[key]) for key in keys)
+
+
+def invalidate(*scopes: str) -> None:
+    """Start a new generation of the scopes."""
+    cache = get_cache()
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def drop(*scopes: str) -> None:
+    """Forget generations of scopes whose data is gone for good."""
+    get_cache().delete_many(
+        [GENERATION_KEY.format(scope=scope) for scope in scopes]
+    )
+
+
+def normalize_query(query_params, exclude: tuple = ()) -> str:
+    """Return non-empty query parameters sorted by name and value."""
+    return urlencode(
+        sorted(
+            (name, value)
+            for name, values in query_params.lists()
+            if name not in exclude
+            for value in values
+            if value != ""
+        )
+    )
+
+
+def get_digest(scopes: tuple, url: str, query: str) -> str:
+    """Return digest of the scopes, URL and query."""
+    return hashlib.sha1(
+        f"{':'.join(scopes)}:{url}?{query}".encode()
+    ).hexdigest()
+
+
+def get_key(scopes: tuple, url: str, query: str) -> str:
+    """Return cache key of the response depending on the scopes.
+
+    The URL includes scheme and host, because responses contain
+    absolute links.
+    """
+    return RESPONSE_KEY.format(
+        generations=get_generations(scopes),
+        digest=get_digest(scopes, url, query),
+    )
+
+
+def get_count_key(scopes: tuple, path: str, query: str) -> str:
+    """Return cache key of the count depending on the scopes."""
+    return COUNT_KEY.format(
+        generations=get_generations(scopes),
+        digest=get_digest(scopes, path, query),
+    )
+
+
+def count(scope: str, name: str) -> None:
+    """Increment hits or misses counter of the scope."""
+    key = STATS_KEY.format(scope=scope, name=name)
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def get_stats(scopes: tuple) -> dict:
+    """Return hits and misses counters of the scopes."""
+    keys = {
+        STATS_KEY.format(scope=scope, name=name): (scope, name)
+        for scope in scopes
+        for name in STATS_NAMES
+    }
+    values = get_cache().get_many(keys)
+    stats = {scope: dict.fromkeys(STATS_NAMES, 0) for scope in scopes}
+    for key, value in values.items():
+        scope, name = keys[key]
+        stats[scope][name] = value
+    return stats
@@ -0,0 +1,71 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PINNED_KEY: str = "replica:pinned:{user_id}"
+
+read_alias: ContextVar = ContextVar("read_alias", default=None)
+
+
+def pin(user) -> None:
+    """Keep reads of the user on the primary for a few seconds."""
+    if user.is_authenticated and settings.READ_REPLICAS:
+        cache.set(
+            PINNED_KEY.format(user_id=user.pk),
+            True,
+            settings.REPLICA_STICKY_SECONDS,
+        )
+
+
+def is_pinned(user) -> bool:
+    """Return whether the user wrote data a few seconds ago."""
+    return user.is_authenticated and bool(
+        cache.get(PINNED_KEY.format(user_id=user.pk))
+    )
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block.
+
+    Data which outlives the request, like cached responses and counts,
+    is read from the primary, so a lagging replica never stores stale
+    data under a generation started by a newer commit.
+    """
+    token = read_alias.set(None)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+def choose_replica() -> str:
+    """Return alias of a random replica or None without replicas."""
+    if not settings.READ_REPLICAS:
+        return None
+    return random.choice(settings.READ_REPLICAS)
+
+
+class ReplicaRouter:
+    """Send reads to the replica set in `read_alias`.
+
+    Everything else, including all writes, migrations and reads
+    while `read_alias` is unset, uses the primary, so replicas are
+    opt-in per view and never receive a write.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
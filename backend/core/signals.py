@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import (FavouriteRecipe, Ingredient, Recipe, ShoppingCart,
+                            Tag, deleted_recipes)
+from users.models import Follow
+
+from . import response_cache
+from .models import Version
+
+User = get_user_model()
+
+RECIPES_SCOPE: str = "recipes"
+RECIPE_SCOPE: str = "recipe:{recipe_id}"
+AUTHORS_SCOPE: str = "authors"
+TAGS_SCOPE: str = "tags"
+INGREDIENTS_SCOPE: str = "ingredients"
+USERS_SCOPE: str = "users"
+VIEWER_SCOPE: str = "viewer:{user_id}"
+
+
+def bump(*scopes: str) -> None:
+    """Bump data versions and drop cached responses of the scopes."""
+    Version.objects.bump(*scopes)
+    transaction.on_commit(lambda: response_cache.invalidate(*scopes))
+
+
+@receiver(post_save, sender=Recipe)
+def bump_recipes(sender, instance, **kwargs) -> None:
+    """Bump versions of recipe lists and of the changed recipe.
+
+    Ingredients of a recipe are written together with the recipe,
+    whose own save already bumps the version, so their rows do not
+    bump it once more each.
+    """
+    bump(RECIPES_SCOPE, RECIPE_SCOPE.format(recipe_id=instance.pk))
+
+
+@receiver(post_delete, sender=Recipe)
+def drop_recipe(sender, instance, **kwargs) -> None:
+    """Bump recipe lists version and drop version of the deleted recipe.
+
+    Recipe ids are never reused, so the version row and cached
+    generation of the recipe are deleted instead of kept forever.
+    """
+    scope = RECIPE_SCOPE.format(recipe_id=instance.pk)
+    bump(RECIPES_SCOPE)
+    Version.objects.filter(scope=scope).delete()
+    transaction.on_commit(lambda: response_cache.drop(scope))
+
+
+@receiver((post_save, post_delete), sender=FavouriteRecipe)
+def bump_recipe_counters(sender, instance, **kwargs) -> None:
+    """Bump version of the recipe after its favourites counter changed.
+
+    Recipe lists do not show counters, so they are not invalidated.
+    """
+    if instance.recipe_id in deleted_recipes.get():
+        return
+    bump(RECIPE_SCOPE.format(recipe_id=instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipe_tags(
+    sender, instance, action: str, reverse: bool, **kwargs
+) -> None:
+    """Bump recipes versions once after recipe tags were changed.
+
+    Recipes of a tag changed from the tag side are not known after
+    a clear, so the tags version their details depend on is bumped.
+    """
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        bump(TAGS_SCOPE, RECIPES_SCOPE)
+    else:
+        bump(RECIPES_SCOPE, RECIPE_SCOPE.format(recipe_id=instance.pk))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags(sender, **kwargs) -> None:
+    """Bump tags and recipes versions after a tag was changed."""
+    bump(TAGS_SCOPE, RECIPES_SCOPE)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredients(sender, **kwargs) -> None:
+    """Bump ingredients and recipes versions after an ingredient changed."""
+    bump(INGREDIENTS_SCOPE, RECIPES_SCOPE)
+
+
+@receiver((post_save, post_delete), sender=User)
+def bump_authors(
+    sender, created: bool = False, update_fields=None, **kwargs
+) -> None:
+    """Bump users and recipes versions after user data was changed.
+
+    A new user has no recipes yet, so only the users version changes.
+    """
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    if created:
+        bump(USERS_SCOPE)
+    else:
+        bump(USERS_SCOPE, AUTHORS_SCOPE, RECIPES_SCOPE)
+
+
+@receiver((post_save, post_delete), sender=FavouriteRecipe)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Follow)
+def bump_viewer(sender, instance, **kwargs) -> None:
+    """Bump version of the user's own state.
+
+    Favourites and carts deleted with their recipe are skipped, the
+    recipes version every view of them depends on is bumped instead.
+    """
+    if getattr(instance, "recipe_id", None) in deleted_recipes.get():
+        return
+    bump(VIEWER_SCOPE.format(user_id=instance.user_id))
@@ -0,0 +1,19 @@
+from core.checks import check_replica_cache
+
+FILE_CACHE: str = "django.core.cache.backends.filebased.FileBasedCache"
+
+
+def test_replicas_require_shared_cache(settings, tmp_path):
+    """Replicas with a cache of a single process are rejected."""
+    settings.READ_REPLICAS = ["replica_1"]
+    assert [error.id for error in check_replica_cache(None)] == ["core.E001"]
+    settings.CACHES = {
+        "default": {"BACKEND": FILE_CACHE, "LOCATION": str(tmp_path)}
+    }
+    assert check_replica_cache(None) == []
+
+
+def test_process_cache_without_replicas(settings):
+    """A cache of a single process is fine without replicas."""
+    settings.READ_REPLICAS = []
+    assert check_replica_cache(None) == []
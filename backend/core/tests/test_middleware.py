@@ -0,0 +1,18 @@
+import pytest
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+def test_server_timing_only_for_staff(settings, admin_user, user_client, tags):
+    """Query counts are logged for everyone and sent to staff only."""
+    settings.SQL_INSTRUMENTATION_SAMPLE_RATE = 1
+    url = reverse("api:tag-list")
+    assert "Server-Timing" not in APIClient().get(url)
+    assert "Server-Timing" not in user_client.get(url)
+    staff_client = APIClient()
+    staff_client.credentials(
+        HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=admin_user)}"
+    )
+    assert "queries" in staff_client.get(url)["Server-Timing"]
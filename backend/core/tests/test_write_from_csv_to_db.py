@@ -0,0 +1,49 @@
+import io
+import json
+
+import pytest
+from core.management.commands import write_from_csv_to_db
+from core.management.commands.write_from_csv_to_db import read_json
+from django.core.management import call_command
+from recipes.models import Ingredient
+
+ROWS: list = [["мука", "г"], ["молоко", "мл"]]
+
+
+@pytest.mark.parametrize(
+    "content",
+    (
+        json.dumps(
+            [{"name": name, "measurement_unit": unit} for name, unit in ROWS]
+        ),
+        json.dumps(ROWS),
+        "\n".join(json.dumps(row) for row in ROWS),
+        "\n".join(
+            json.dumps({"name": name, "measurement_unit": unit})
+            for name, unit in ROWS
+        ),
+    ),
+    ids=("objects", "pairs", "pair lines", "object lines"),
+)
+def test_read_json_shapes(monkeypatch, content):
+    """Objects and pairs are read from arrays and lines as is."""
+    monkeypatch.setattr(write_from_csv_to_db, "JSON_CHUNK_SIZE", 7)
+    rows = [tuple(row) for _, row in read_json(io.StringIO(content))]
+    assert rows == [tuple(row) for row in ROWS]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("shape", ("objects", "pairs"))
+def test_import_json(tmp_path, shape):
+    """Both array shapes are imported without invalid rows."""
+    items = ROWS if shape == "pairs" else [
+        {"name": name, "measurement_unit": unit} for name, unit in ROWS
+    ]
+    path = tmp_path / "ingredients.json"
+    path.write_text(json.dumps(items), encoding="utf-8")
+    output = io.StringIO()
+    call_command("write_from_csv_to_db", str(path), stdout=output)
+    assert "Inserted: 2, skipped: 0, invalid: 0" in output.getvalue()
+    assert set(
+        Ingredient.objects.values_list("name", "measurement_unit")
+    ) == {tuple(row) for row in ROWS}
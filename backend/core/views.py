@@ -0,0 +1,58 @@
+import ipaddress
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import render as render_template
+
+from . import profiling
+from .metrics import registry, render
+
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def is_internal(request) -> bool:
+    """Return whether the client address is in an allowed network."""
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics(request) -> HttpResponse:
+    """Metrics of all workers in the Prometheus text format."""
+    if not is_internal(request):
+        raise Http404
+    return HttpResponse(render(registry.collect()), content_type=CONTENT_TYPE)
+
+
+@staff_member_required
+def profiles(request) -> HttpResponse:
+    """Admin page listing captured profiles and stats of a chosen one."""
+    name = request.GET.get("name", "")
+    path = profiling.get_path(name)
+    return render_template(
+        request,
+        "admin/profiles.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Профили запросов",
+            "profiles": profiling.list_profiles(),
+            "selected": name if path else None,
+            "stats": profiling.format_stats(path) if path else None,
+        },
+    )
+
+
+@staff_member_required
+def profile_download(request, name: str) -> FileResponse:
+    """Download a captured profile in pstats format."""
+    path = profiling.get_path(name)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=name)
@@ -1,8 +1,14 @@
+from core.views import metrics, profile_download, profiles
 from django.contrib import admin
 from django.urls import include, path
 
 urlpatterns = [
+    path("admin/profiles/", profiles, name="profiles"),
+    path(
+        "admin/profiles/<str:name>", profile_download, name="profile_download"
+    ),
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
     path("api/auth/", include("djoser.urls.authtoken")),
+    path("internal/metrics", metrics, name="metrics"),
 ]
@@ -0,0 +1,74 @@
+import glob
+import os
+
+CPU_MAX_PATH = "/sys/fs/cgroup/cpu.max"
+CFS_QUOTA_PATH = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CFS_PERIOD_PATH = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def read_cpu_quota():
+    """Return CPU quota of the container's cgroup or None if unlimited.
+
+    Docker --cpus sets a CFS quota, which the affinity mask does not
+    reflect, so it is read from cgroup v2 or v1 files.
+    """
+    try:
+        with open(CPU_MAX_PATH) as file:
+            quota, period = file.read().split()
+    except (OSError, ValueError):
+        try:
+            with open(CFS_QUOTA_PATH) as file:
+                quota = file.read().strip()
+            with open(CFS_PERIOD_PATH) as file:
+                period = file.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1"):
+        return None
+    return int(quota) / int(period)
+
+
+def get_cpu_count() -> int:
+    """Return CPUs available to the process within the CPU quota."""
+    count = len(os.sched_getaffinity(0))
+    quota = read_cpu_quota()
+    if quota is not None:
+        count = min(count, max(1, int(quota)))
+    return count
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8080")
+worker_class = "gthread"
+# One worker per available CPU: on top of that workers only compete for
+# the CPU and stretch the latency tail, threads cover waits for the
+# database and the cache.
+workers = int(os.getenv("GUNICORN_WORKERS", get_cpu_count()))
+threads = int(os.getenv("GUNICORN_THREADS", 2))
+preload_app = True
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = 5
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")
+
+
+def on_starting(server):
+    """Run system checks, drop metrics files of the previous run."""
+    from django.core.management import call_command
+    from django.core.management.base import SystemCheckError
+
+    try:
+        call_command("check")
+    except SystemCheckError as error:
+        raise SystemExit(error)
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+            os.remove(path)
+
+
+def pre_fork(server, worker):
+    """Do not share database sockets of the preloaded app with workers."""
+    from django.db import connections
+
+    connections.close_all()
@@ -1,40 +1,117 @@
+from core.admin_filters import AutocompleteFilterMixin, autocomplete_filter
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.forms.models import BaseInlineFormSet
 
 from .models import (FavouriteRecipe, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingListItem, Tag)
+
+
+class LabelledAutocompleteSelect(AutocompleteSelect):
+    """Autocomplete select taking selected option labels from `labels`.
+
+    AutocompleteSelect loads the selected object with a query per
+    widget, which is a query per row of an inline. Values missing
+    from `labels` are still loaded that way.
+    """
+    labels: dict = {}
+
+    def optgroups(self, name, value, attr=None) -> list:
+        """Return the selected option without a query when known."""
+        selected = {
+            str(item)
+            for item in value
+            if str(item) not in self.choices.field.empty_values
+        }
+        if not selected <= self.labels.keys():
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, "", "", False, 0))
+        for option_value in selected:
+            options.append(
+                self.create_option(
+                    name,
+                    option_value,
+                    self.labels[option_value],
+                    True,
+                    len(options),
+                )
+            )
+        return [(None, options, 0)]
+
+
+class RecipeIngredientFormSet(BaseInlineFormSet):
+    """Recipe ingredient forms sharing labels of the saved ingredients."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Pass labels of ingredients loaded with the rows to widgets."""
+        super().__init__(*args, **kwargs)
+        labels = {
+            str(item.ingredient_id): str(item.ingredient)
+            for item in self.get_queryset()
+        }
+        for form in self.forms:
+            form.fields["ingredient"].widget.widget.labels = labels
 
 
 class RecipeIngredientAdmin(admin.StackedInline):
     """Stacked in line ingredients for RecipeAdmin."""
     model: RecipeIngredient = RecipeIngredient
+    formset: BaseInlineFormSet = RecipeIngredientFormSet
     autocomplete_fields: tuple = ("ingredient",)
 
+    def get_queryset(self, request):
+        """Load ingredients together with the rows."""
+        return super().get_queryset(request).select_related("ingredient")
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """Use autocomplete widget which can skip loading ingredients."""
+        if db_field.name == "ingredient":
+            kwargs["widget"] = LabelledAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get("using")
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     """Admin interface for Recipies."""
     list_display: tuple = (
         "name",
         "author",
         "get_favorite_count",
     )
+    list_select_related: tuple = ("author",)
     search_fields: tuple = (
         "name",
         "author__username",
-        "tags",
     )
     list_filter: tuple = (
-        "name",
-        "author__username",
+        autocomplete_filter("author"),
         "tags",
     )
+    raw_id_fields: tuple = ("author",)
+    show_full_result_count: bool = False
     inlines: tuple = (RecipeIngredientAdmin,)
     empty_value_display: str = "-пусто-"
 
-    @admin.display(description="В избранном")
+    @admin.display(description="В избранном", ordering="favorites_count")
     def get_favorite_count(self, obj) -> int:
         """Get favorite recipes count."""
-        return obj.favourite.count()
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change) -> None:
+        """Save ingredients, rebuild search vector and shopping lists."""
+        Recipe.objects.filter(pk=form.instance.pk).lock()
+        old_amounts = dict(
+            RecipeIngredient.objects.filter(
+                recipe_id=form.instance.pk
+            ).values_list("ingredient_id", "amount")
+        )
+        super().save_related(request, form, formsets, change)
+        Recipe.objects.filter(pk=form.instance.pk).update_search_vector()
+        ShoppingListItem.objects.change_recipe(form.instance.pk, old_amounts)
 
 
 @admin.register(Tag)
@@ -47,11 +124,17 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(FavouriteRecipe)
-class FavoriteRecipeAdmin(admin.ModelAdmin):
+class FavoriteRecipeAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     """Admin interface for favourite recipes."""
     list_display: tuple = ("id", "user", "recipe")
+    list_select_related: tuple = ("user", "recipe")
     search_fields: tuple = ("user__username", "recipe__name")
-    list_filter: tuple = ("user__username", "recipe__name")
+    list_filter: tuple = (
+        autocomplete_filter("user"),
+        autocomplete_filter("recipe"),
+    )
+    raw_id_fields: tuple = ("user", "recipe")
+    show_full_result_count: bool = False
     empty_value_display: str = "-пусто-"
 
 
@@ -67,26 +150,26 @@ class IngridientAdmin(admin.ModelAdmin):
         "name",
         "measurement_unit",
     )
-    list_filter: tuple = (
-        "name",
-        "measurement_unit",
-    )
+    show_full_result_count: bool = False
     empty_value_display: str = "пусто"
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     """Admin interface for shopping cart."""
     list_display: tuple = (
         "user",
         "recipe",
     )
+    list_select_related: tuple = ("user", "recipe")
     search_fields: tuple = (
         "user__username",
         "recipe__name",
     )
     list_filter: tuple = (
-        "user__username",
-        "recipe__name",
+        autocomplete_filter("user"),
+        autocomplete_filter("recipe"),
     )
+    raw_id_fields: tuple = ("user", "recipe")
+    show_full_result_count: bool = False
     empty_value_display: str = "-пусто-"
@@ -0,0 +1,56 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+VARIANTS_DIR: str = "variants"
+SOURCE_KEY: str = "source"
+
+
+def get_variant_name(name: str, variant: str) -> str:
+    """Return storage name of the image variant."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    extension = settings.RECIPE_IMAGE_VARIANT_FORMAT.lower()
+    return os.path.join(
+        directory, VARIANTS_DIR, f"{stem}_{variant}.{extension}"
+    )
+
+
+def make_variants(name: str) -> dict:
+    """Save resized variants of the stored image.
+
+    Return storage names of the variants keyed by variant name,
+    the source image name is stored under SOURCE_KEY.
+    """
+    image_format = settings.RECIPE_IMAGE_VARIANT_FORMAT
+    variants = {SOURCE_KEY: name}
+    with default_storage.open(name, "rb") as file:
+        source = Image.open(file)
+        largest = max(settings.RECIPE_IMAGE_VARIANTS.values())
+        source.draft("RGB", largest)
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ("RGB", "RGBA") or image_format == "JPEG":
+            source = source.convert("RGB")
+        for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+            image = source.copy()
+            image.thumbnail(size, Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, quality=80)
+            variant_name = get_variant_name(name, variant)
+            if default_storage.exists(variant_name):
+                default_storage.delete(variant_name)
+            variants[variant] = default_storage.save(
+                variant_name, ContentFile(buffer.getvalue())
+            )
+    return variants
+
+
+def get_variant_url(image, variants: dict, variant: str) -> str:
+    """Return url of the image variant or of the original image."""
+    if variants.get(SOURCE_KEY) == image.name and variant in variants:
+        return default_storage.url(variants[variant])
+    return image.url
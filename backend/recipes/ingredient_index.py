@@ -0,0 +1,93 @@
+import time
+from bisect import bisect_left
+from itertools import chain
+from threading import Lock
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Ingredient
+
+PREFIX_END: str = "\uffff"
+
+
+def normalize(value: str) -> str:
+    """Return case and "ё" insensitive form of value."""
+    return value.strip().lower().replace("ё", "е")
+
+
+class IngredientIndex:
+    """In-process ranked prefix index for ingredient search.
+
+    Ingredients are kept sorted by normalized name, so prefix matches
+    are found with bisect and substring matches with a linear scan
+    over the rest of the index. The index is built lazily, dropped
+    when an ingredient changes and rebuilt after the TTL expires,
+    so other workers catch up with changes made elsewhere.
+    """
+    def __init__(self) -> None:
+        self._entries: tuple = None
+        self._built_at: float = 0
+        self._lock: Lock = Lock()
+
+    def build(self) -> tuple:
+        """Load ingredients from the primary and build the index.
+
+        The index lives until the next change or the TTL, so it is
+        never built from a lagging replica.
+        """
+        ingredients = sorted(
+            Ingredient.objects.using(DEFAULT_DB_ALIAS),
+            key=lambda item: (normalize(item.name), item.measurement_unit),
+        )
+        entries = (
+            [normalize(ingredient.name) for ingredient in ingredients],
+            ingredients,
+        )
+        self._entries = entries
+        self._built_at = time.monotonic()
+        return entries
+
+    def invalidate(self) -> None:
+        """Drop the index, it will be rebuilt on the next search."""
+        self._entries = None
+
+    def is_expired(self) -> bool:
+        """Return whether the index is older than the TTL."""
+        return (
+            time.monotonic() - self._built_at
+            > settings.INGREDIENT_INDEX_TTL
+        )
+
+    def get_entries(self) -> tuple:
+        """Return actual index entries, build them if needed.
+
+        Freshness is checked again under the lock, so threads waiting
+        for a rebuild use its result instead of building once more.
+        """
+        entries = self._entries
+        if entries is None or self.is_expired():
+            with self._lock:
+                entries = self._entries
+                if entries is None or self.is_expired():
+                    entries = self.build()
+        return entries
+
+    def search(self, query: str, limit: int = None) -> list:
+        """Return prefix matches first and then substring matches."""
+        keys, ingredients = self.get_entries()
+        query = normalize(query)
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + PREFIX_END, start)
+        result = ingredients[start:end]
+        if not query or limit is not None and len(result) >= limit:
+            return result[:limit]
+        for index in chain(range(start), range(end, len(keys))):
+            if query in keys[index]:
+                result.append(ingredients[index])
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+
+ingredient_index: IngredientIndex = IngredientIndex()
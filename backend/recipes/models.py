@@ -1,6 +1,15 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.exceptions import EmptyResultSet
 from django.core.validators import MinValueValidator, RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Greatest, RowNumber
+from users.models import Follow
 
 User = get_user_model()
 
@@ -8,6 +17,153 @@ MINIMUM_VALUE: int = 1
 NAME_MAX_VALUE: int = 100
 TEXT_MAX_VALUE: int = 1000
 HEX_MAX_VALUE: int = 7
+SEARCH_CONFIG: str = "russian"
+COUNTER_FIELDS: tuple = ("favorites_count", "in_carts_count")
+
+deleted_recipes: ContextVar = ContextVar("deleted_recipes", default=())
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Custom queryset for recipes."""
+    def with_user_flags(self, user):
+        """Annotate favourite and shopping cart flags for the user."""
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+                is_in_shopping_cart=models.Value(
+                    False, output_field=models.BooleanField()
+                ),
+            )
+        return self.annotate(
+            is_favorited=models.Exists(
+                FavouriteRecipe.objects.filter(
+                    user=user, recipe=models.OuterRef("pk")
+                )
+            ),
+            is_in_shopping_cart=models.Exists(
+                ShoppingCart.objects.filter(
+                    user=user, recipe=models.OuterRef("pk")
+                )
+            ),
+        )
+
+    def lock(self) -> list:
+        """Lock the recipes until the end of transaction, return ids.
+
+        Shopping list totals are changed from recipe ingredients, so
+        cart changes and ingredient changes of a recipe run one by one.
+        """
+        return list(
+            self.select_for_update().order_by("pk").values_list(
+                "pk", flat=True
+            )
+        )
+
+    @contextmanager
+    def deleting(self):
+        """Prepare deletion of the recipes inside the block.
+
+        Shopping list totals of all carts with the recipes are reduced
+        at once, and receivers of carts and favourites deleted by
+        cascade skip their per-row work for the recipes going away.
+        """
+        recipe_ids = self.lock()
+        ShoppingListItem.objects.remove_recipes(recipe_ids)
+        token = deleted_recipes.set((*deleted_recipes.get(), *recipe_ids))
+        try:
+            yield
+        finally:
+            deleted_recipes.reset(token)
+
+    def delete(self):
+        """Delete the recipes with their carts and favourites in bulk."""
+        with transaction.atomic(using=self.db, savepoint=False):
+            with self.deleting():
+                return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def change_counters(self, **deltas: int) -> int:
+        """Atomically add deltas to counters of the recipes."""
+        return self.update(
+            **{
+                field: Greatest(models.F(field) + delta, 0)
+                for field, delta in deltas.items()
+            }
+        )
+
+    def top_per_author(self, limit: int = None):
+        """Return at most `limit` latest recipes of every author.
+
+        Recipes are ranked with ROW_NUMBER() partitioned by author,
+        so the whole selection is made in a single query.
+        """
+        if limit is None:
+            return self
+        ranked = self.annotate(
+            row_number=models.Window(
+                expression=RowNumber(),
+                partition_by=models.F("author_id"),
+                order_by=models.F("pub_date").desc(),
+            )
+        )
+        try:
+            sql, params = ranked.query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return self.none()
+        return self.raw(
+            f"SELECT * FROM ({sql}) AS ranked "
+            "WHERE ranked.row_number <= %s ORDER BY ranked.row_number",
+            (*params, limit),
+        )
+
+    def update_search_vector(self) -> int:
+        """Rebuild full-text search vector from name, ingredients, text."""
+        ingredient_names = (
+            RecipeIngredient.objects.filter(recipe=models.OuterRef("pk"))
+            .values("recipe")
+            .annotate(names=StringAgg("ingredient__name", " "))
+            .values("names")
+        )
+        return self.update(
+            search_vector=(
+                SearchVector("name", weight="A", config=SEARCH_CONFIG)
+                + SearchVector(
+                    Coalesce(
+                        models.Subquery(ingredient_names),
+                        models.Value(""),
+                    ),
+                    weight="B",
+                    config=SEARCH_CONFIG,
+                )
+                + SearchVector("text", weight="C", config=SEARCH_CONFIG)
+            )
+        )
+
+    def for_read(self, user):
+        """Return queryset with a fixed number of queries for reading."""
+        authors = User.objects.all()
+        if user.is_authenticated:
+            authors = authors.annotate(
+                is_subscribed=models.Exists(
+                    Follow.objects.filter(
+                        user=user, author=models.OuterRef("pk")
+                    )
+                )
+            )
+        return self.with_user_flags(user).prefetch_related(
+            "tags",
+            models.Prefetch("author", queryset=authors),
+            models.Prefetch(
+                "recipe_ingredient",
+                queryset=RecipeIngredient.objects.select_related(
+                    "ingredient"
+                ),
+            ),
+        )
 
 
 class Recipe(models.Model):
@@ -30,6 +186,9 @@ class Recipe(models.Model):
         upload_to="foodgram_backend/images",
         null=False,
     )
+    image_variants = models.JSONField(
+        verbose_name="Варианты изображения", default=dict, editable=False
+    )
     text = models.TextField(
         verbose_name="Описание", null=False, max_length=TEXT_MAX_VALUE
     )
@@ -52,16 +211,53 @@ class Recipe(models.Model):
     pub_date: models.DateTimeField = models.DateTimeField(
         verbose_name="Дата публикации", auto_now_add=True
     )
+    search_vector = SearchVectorField(
+        verbose_name="Поисковый вектор", null=True, editable=False
+    )
+    favorites_count: int = models.PositiveIntegerField(
+        verbose_name="В избранном", default=0, editable=False
+    )
+    in_carts_count: int = models.PositiveIntegerField(
+        verbose_name="В списках покупок", default=0, editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name: str = "Рецепт"
         verbose_name_plural: str = "Рецепты"
-        ordering: tuple = ("-pub_date",)
+        ordering: tuple = ("-pub_date", "-id")
+        indexes: tuple = (
+            GinIndex(fields=("search_vector",), name="recipe_search_idx"),
+            models.Index(
+                fields=("-pub_date", "-id"), name="recipe_pub_date_id_idx"
+            ),
+        )
 
     def __str__(self) -> str:
         """Return a string representation of recipe name."""
         return self.name
 
+    def save(self, *args, **kwargs) -> None:
+        """Save the recipe without writing back its counters.
+
+        Counters are changed by atomic updates only, so the values
+        loaded with the recipe must not overwrite concurrent changes.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Delete the recipe with its carts and favourites in bulk."""
+        with transaction.atomic(savepoint=False):
+            with Recipe.objects.filter(pk=self.pk).deleting():
+                return super().delete(*args, **kwargs)
+
 
 class Tag(models.Model):
     """Tag model."""
@@ -221,3 +417,162 @@ class ShoppingCart(models.Model):
             f"{self.user.username} добавил "
             f"{self.recipe.name} в список покупок."
         )
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    """Custom queryset for shopping list totals."""
+    def change_totals(self, deltas: dict) -> None:
+        """Add amount deltas keyed by (user id, ingredient id) to totals.
+
+        Missing rows are inserted empty with ON CONFLICT DO NOTHING
+        first, so concurrent changes of the same new ingredient wait
+        for each other on the row lock instead of failing on the
+        unique constraint. Rows are touched in key order to avoid
+        deadlocks between such changes.
+        """
+        deltas = dict(
+            sorted((key, delta) for key, delta in deltas.items() if delta)
+        )
+        if not deltas:
+            return
+        self.bulk_create(
+            (
+                self.model(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=0,
+                )
+                for (user_id, ingredient_id), delta in deltas.items()
+                if delta > 0
+            ),
+            ignore_conflicts=True,
+        )
+        items = self.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in deltas},
+            ingredient_id__in={ingredient_id for _, ingredient_id in deltas},
+        ).order_by("user_id", "ingredient_id")
+        to_update, to_delete = [], []
+        for item in items:
+            delta = deltas.get((item.user_id, item.ingredient_id), 0)
+            if not delta:
+                continue
+            item.total_amount += delta
+            if item.total_amount > 0:
+                to_update.append(item)
+            else:
+                to_delete.append(item.pk)
+        self.bulk_update(to_update, ("total_amount",))
+        self.filter(pk__in=to_delete).delete()
+
+    def add_recipe(self, user_id: int, recipe_id: int, sign: int = 1):
+        """Add recipe ingredients to user's totals, remove if sign is -1.
+
+        The recipe is locked first, so its ingredients cannot change
+        until the cart change is committed.
+        """
+        Recipe.objects.filter(pk=recipe_id).lock()
+        self.change_totals(
+            {
+                (user_id, ingredient_id): sign * amount
+                for ingredient_id, amount in RecipeIngredient.objects.filter(
+                    recipe_id=recipe_id
+                ).values_list("ingredient_id", "amount")
+            }
+        )
+
+    def remove_recipes(self, recipe_ids: list) -> None:
+        """Remove ingredients of the recipes from all carts with them."""
+        self.change_totals(
+            {
+                key: -amount
+                for key, amount in self.sum_amounts(
+                    recipe_id__in=recipe_ids,
+                    recipe__shopping_cart__isnull=False,
+                ).items()
+            }
+        )
+
+    def change_recipe(self, recipe_id: int, old_amounts: dict) -> None:
+        """Apply recipe ingredients change to totals of carts with it.
+
+        The recipe must be locked with `lock()` before its old amounts
+        were read, so carts changed meanwhile are not missed.
+        """
+        new_amounts = dict(
+            RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list(
+                "ingredient_id", "amount"
+            )
+        )
+        changes = {
+            ingredient_id: new_amounts.get(ingredient_id, 0)
+            - old_amounts.get(ingredient_id, 0)
+            for ingredient_id in new_amounts.keys() | old_amounts.keys()
+        }
+        changes = {key: delta for key, delta in changes.items() if delta}
+        if not changes:
+            return
+        user_ids = ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list("user_id", flat=True)
+        self.change_totals(
+            {
+                (user_id, ingredient_id): delta
+                for user_id in user_ids
+                for ingredient_id, delta in changes.items()
+            }
+        )
+
+    def calculate(self, user_ids) -> dict:
+        """Return totals calculated from shopping carts of users."""
+        return self.sum_amounts(recipe__shopping_cart__user__in=user_ids)
+
+    @staticmethod
+    def sum_amounts(**lookups) -> dict:
+        """Return amounts of cart ingredients summed per user."""
+        return {
+            (item["recipe__shopping_cart__user"], item["ingredient"]): item[
+                "total_amount"
+            ]
+            for item in RecipeIngredient.objects.filter(**lookups)
+            .values("recipe__shopping_cart__user", "ingredient")
+            .annotate(total_amount=models.Sum("amount"))
+            .order_by()
+        }
+
+
+class ShoppingListItem(models.Model):
+    """Ingredient totals of user's shopping cart.
+
+    Denormalised from ShoppingCart and RecipeIngredient,
+    kept in sync on every shopping cart and recipe change.
+    """
+    user: int = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Пользователь",
+    )
+    ingredient: int = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Ингридиент",
+    )
+    total_amount: int = models.PositiveIntegerField(
+        verbose_name="Общее количество"
+    )
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name: str = "Позиция списка покупок"
+        verbose_name_plural: str = "Позиции списка покупок"
+        constraints: list = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"], name="unique_shopping_list_item"
+            )
+        ]
+
+    def __str__(self) -> str:
+        """Return a string representation of this object."""
+        return f"{self.ingredient}: {self.total_amount}"
@@ -0,0 +1,100 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from users.models import UserStats
+
+from .images import SOURCE_KEY, make_variants
+from .ingredient_index import ingredient_index
+from .models import (FavouriteRecipe, Ingredient, Recipe, ShoppingCart,
+                     ShoppingListItem, deleted_recipes)
+
+COUNTERS: dict = {
+    FavouriteRecipe: "favorites_count",
+    ShoppingCart: "in_carts_count",
+}
+
+logger = logging.getLogger(__name__)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs) -> None:
+    """Drop ingredient search index after ingredient was changed."""
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs) -> None:
+    """Add recipe ingredients to user's shopping list totals."""
+    if created:
+        ShoppingListItem.objects.add_recipe(
+            instance.user_id, instance.recipe_id
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs) -> None:
+    """Remove recipe ingredients from user's shopping list totals.
+
+    Runs before deletion, so recipe ingredients are still available
+    when the cart row is deleted by cascade with its author. Carts
+    deleted with their recipe were already removed from totals in bulk
+    by `RecipeQuerySet.deleting()`.
+    """
+    if instance.recipe_id in deleted_recipes.get():
+        return
+    ShoppingListItem.objects.add_recipe(
+        instance.user_id, instance.recipe_id, sign=-1
+    )
+
+
+@receiver(post_save, sender=FavouriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_counter(sender, instance, created, **kwargs) -> None:
+    """Count the recipe added to favourites or a shopping cart."""
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).change_counters(
+            **{COUNTERS[sender]: 1}
+        )
+
+
+@receiver(post_delete, sender=FavouriteRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_recipe_counter(sender, instance, **kwargs) -> None:
+    """Stop counting the recipe removed from favourites or a cart."""
+    if instance.recipe_id in deleted_recipes.get():
+        return
+    Recipe.objects.filter(pk=instance.recipe_id).change_counters(
+        **{COUNTERS[sender]: -1}
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def add_author_recipe(sender, instance, created, **kwargs) -> None:
+    """Count a new recipe of the author."""
+    if created:
+        UserStats.objects.change(instance.author_id, recipes_count=1)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_author_recipe(sender, instance, **kwargs) -> None:
+    """Stop counting the deleted recipe of the author."""
+    UserStats.objects.change(instance.author_id, recipes_count=-1)
+
+
+@receiver(post_save, sender=Recipe)
+def make_image_variants(sender, instance, **kwargs) -> None:
+    """Make resized image variants after recipe image was changed."""
+    if (
+        not instance.image
+        or instance.image_variants.get(SOURCE_KEY) == instance.image.name
+    ):
+        return
+    try:
+        instance.image_variants = make_variants(instance.image.name)
+    except OSError:
+        logger.exception("Image variants of recipe %s failed", instance.pk)
+        return
+    Recipe.objects.filter(pk=instance.pk).update(
+        image_variants=instance.image_variants
+    )
@@ -0,0 +1,112 @@
+import pytest
+from django.urls import reverse
+from recipes.models import FavouriteRecipe, ShoppingCart
+
+ROWS_COUNTS: tuple = (1, 30)
+RECIPE_CHANGELIST_QUERIES: int = 5
+SHOPPING_CART_CHANGELIST_QUERIES: int = 4
+FAVOURITE_CHANGELIST_QUERIES: int = 4
+INGREDIENT_CHANGELIST_QUERIES: int = 4
+RECIPE_CHANGEFORM_QUERIES: int = 10
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", ROWS_COUNTS)
+def test_recipe_changelist_queries(
+    admin_client, author, make_recipes, django_assert_max_num_queries, count
+):
+    """Recipe changelist queries do not grow with the page."""
+    make_recipes(author, count)
+    with django_assert_max_num_queries(RECIPE_CHANGELIST_QUERIES):
+        response = admin_client.get(
+            reverse("admin:recipes_recipe_changelist")
+        )
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", ROWS_COUNTS)
+def test_shopping_cart_changelist_queries(
+    admin_client,
+    django_user_model,
+    author,
+    make_recipes,
+    django_assert_max_num_queries,
+    count,
+):
+    """Shopping cart changelist queries do not grow with the page."""
+    recipes = make_recipes(author, count)
+    for index, recipe in enumerate(recipes):
+        buyer = django_user_model.objects.create_user(
+            username=f"buyer{index}", email=f"buyer{index}@foodgram.ru"
+        )
+        ShoppingCart.objects.create(user=buyer, recipe=recipe)
+    with django_assert_max_num_queries(SHOPPING_CART_CHANGELIST_QUERIES):
+        response = admin_client.get(
+            reverse("admin:recipes_shoppingcart_changelist")
+        )
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", ROWS_COUNTS)
+def test_favourite_changelist_queries(
+    admin_client,
+    django_user_model,
+    author,
+    make_recipes,
+    django_assert_max_num_queries,
+    count,
+):
+    """Favourite recipes changelist queries do not grow with the page."""
+    recipes = make_recipes(author, count)
+    for index, recipe in enumerate(recipes):
+        fan = django_user_model.objects.create_user(
+            username=f"fan{index}", email=f"fan{index}@foodgram.ru"
+        )
+        FavouriteRecipe.objects.create(user=fan, recipe=recipe)
+    with django_assert_max_num_queries(FAVOURITE_CHANGELIST_QUERIES):
+        response = admin_client.get(
+            reverse("admin:recipes_favouriterecipe_changelist")
+        )
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_ingredient_changelist_queries(
+    admin_client, ingredients, django_assert_max_num_queries
+):
+    """Ingredient changelist does not scan the table for filters."""
+    with django_assert_max_num_queries(
+        INGREDIENT_CHANGELIST_QUERIES
+    ) as context:
+        response = admin_client.get(
+            reverse("admin:recipes_ingredient_changelist")
+        )
+    assert response.status_code == 200
+    assert not any(
+        "DISTINCT" in query["sql"] for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("ingredients_count", (1, 100))
+def test_recipe_changeform_queries(
+    admin_client,
+    author,
+    ingredients,
+    make_recipes,
+    django_assert_max_num_queries,
+    ingredients_count,
+):
+    """Recipe change form queries do not grow with its ingredients."""
+    recipe = make_recipes(author, 1, ingredients_count=ingredients_count)[0]
+    with django_assert_max_num_queries(RECIPE_CHANGEFORM_QUERIES):
+        response = admin_client.get(
+            reverse("admin:recipes_recipe_change", args=(recipe.pk,))
+        )
+    assert response.status_code == 200
+    assert (
+        f'<option value="{ingredients[0].pk}" selected>Ингредиент 0, г'
+        in response.content.decode()
+    )
@@ -0,0 +1,14 @@
+import pytest
+from recipes.models import FavouriteRecipe, Recipe
+
+
+@pytest.mark.django_db
+def test_save_keeps_concurrent_counters(user, author, make_recipes):
+    """Saving a loaded recipe does not overwrite its counters."""
+    recipe = Recipe.objects.get(pk=make_recipes(author, 1)[0].pk)
+    FavouriteRecipe.objects.create(user=user, recipe=recipe)
+    recipe.name = "Новое название"
+    recipe.save()
+    recipe = Recipe.objects.get(pk=recipe.pk)
+    assert recipe.name == "Новое название"
+    assert recipe.favorites_count == 1
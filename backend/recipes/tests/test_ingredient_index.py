@@ -0,0 +1,37 @@
+import threading
+import time
+
+import pytest
+from django.urls import reverse
+from recipes.ingredient_index import IngredientIndex
+from rest_framework.test import APIClient
+
+
+def test_waiting_threads_do_not_rebuild_index(monkeypatch):
+    """Threads waiting for a rebuild reuse the index built meanwhile."""
+    index = IngredientIndex()
+    builds = []
+    monkeypatch.setattr(index, "build", lambda: builds.append(1) or ((), ()))
+    index._lock.acquire()
+    threads = [
+        threading.Thread(target=index.get_entries) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    index._entries = ((), ())
+    index._built_at = time.monotonic()
+    index._lock.release()
+    for thread in threads:
+        thread.join()
+    assert builds == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ({}, {"name": ""}, {"limit": 1000}))
+def test_ingredient_search_is_capped(settings, ingredients, query):
+    """Empty and unbounded searches return at most the capped number."""
+    settings.INGREDIENT_SEARCH_LIMIT = 10
+    response = APIClient().get(reverse("api:ingredient-list"), query)
+    assert response.status_code == 200
+    assert len(response.data) == 10
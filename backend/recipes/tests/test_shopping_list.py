@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+from django.db import connection, transaction
+from django.db.models import F
+from recipes.models import (FavouriteRecipe, Recipe, RecipeIngredient,
+                            ShoppingCart, ShoppingListItem)
+
+RECIPE_DELETE_QUERIES: int = 15
+
+
+def change_totals(deltas: dict, inserted=None, proceed=None) -> None:
+    """Change totals in a transaction of a separate connection."""
+    try:
+        with transaction.atomic():
+            ShoppingListItem.objects.change_totals(deltas)
+            if inserted is not None:
+                inserted.set()
+                proceed.wait(5)
+    finally:
+        connection.close()
+
+
+def add_to_cart(user, recipe) -> None:
+    """Add the recipe to the cart in a separate connection."""
+    try:
+        with transaction.atomic():
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+    finally:
+        connection.close()
+
+
+def change_amounts(recipe, changed, proceed) -> None:
+    """Change amounts of the recipe ingredients as recipe updates do."""
+    try:
+        with transaction.atomic():
+            Recipe.objects.filter(pk=recipe.pk).lock()
+            ingredients = RecipeIngredient.objects.filter(recipe=recipe)
+            old_amounts = dict(
+                ingredients.values_list("ingredient_id", "amount")
+            )
+            ingredients.update(amount=F("amount") + 2)
+            changed.set()
+            proceed.wait(5)
+            ShoppingListItem.objects.change_recipe(recipe.pk, old_amounts)
+    finally:
+        connection.close()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_changes_of_new_item(user, ingredients):
+    """Concurrent additions of a new ingredient are summed up."""
+    key = (user.pk, ingredients[0].pk)
+    inserted, proceed = threading.Event(), threading.Event()
+    first = threading.Thread(
+        target=change_totals, args=({key: 2}, inserted, proceed)
+    )
+    second = threading.Thread(target=change_totals, args=({key: 3},))
+    first.start()
+    assert inserted.wait(5)
+    second.start()
+    second.join(0.5)
+    proceed.set()
+    first.join()
+    second.join()
+    item = ShoppingListItem.objects.get()
+    assert (item.user_id, item.ingredient_id) == key
+    assert item.total_amount == 5
+
+
+@pytest.mark.django_db
+def test_totals_reaching_zero_are_deleted(user, ingredients):
+    """Totals are removed once all their amounts are subtracted."""
+    first, second = (
+        (user.pk, ingredient.pk) for ingredient in ingredients[:2]
+    )
+    ShoppingListItem.objects.change_totals({first: 2, second: 1})
+    ShoppingListItem.objects.change_totals({first: -2, second: 1})
+    assert dict(
+        ShoppingListItem.objects.values_list("ingredient", "total_amount")
+    ) == {second[1]: 2}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cart_addition_during_recipe_change(user, author, make_recipes):
+    """A cart addition waits for a recipe change to read new amounts."""
+    recipe = make_recipes(author, 1)[0]
+    changed, proceed = threading.Event(), threading.Event()
+    changing = threading.Thread(
+        target=change_amounts, args=(recipe, changed, proceed)
+    )
+    adding = threading.Thread(target=add_to_cart, args=(user, recipe))
+    changing.start()
+    assert changed.wait(5)
+    adding.start()
+    adding.join(0.5)
+    proceed.set()
+    changing.join()
+    adding.join()
+    assert dict(
+        ShoppingListItem.objects.values_list("ingredient", "total_amount")
+    ) == dict(RecipeIngredient.objects.values_list("ingredient", "amount"))
+    assert set(
+        RecipeIngredient.objects.values_list("amount", flat=True)
+    ) == {7}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", (2, 20))
+def test_recipe_delete_queries_do_not_grow(
+    django_user_model, author, make_recipes, django_assert_num_queries, count
+):
+    """Carts and favourites are removed with the recipe in bulk."""
+    deleted, kept = make_recipes(author, 2)
+    users = django_user_model.objects.bulk_create(
+        django_user_model(username=f"user{index}", email=f"{index}@mail.ru")
+        for index in range(count)
+    )
+    for user in users:
+        FavouriteRecipe.objects.create(user=user, recipe=deleted)
+        ShoppingCart.objects.create(user=user, recipe=deleted)
+    ShoppingCart.objects.create(user=users[0], recipe=kept)
+    with django_assert_num_queries(RECIPE_DELETE_QUERIES):
+        deleted.delete()
+    assert not ShoppingCart.objects.filter(recipe_id=deleted.pk).exists()
+    assert dict(
+        ShoppingListItem.objects.values_list("ingredient", "total_amount")
+    ) == dict(
+        RecipeIngredient.objects.filter(recipe=kept).values_list(
+            "ingredient", "amount"
+        )
+    )
+    assert set(
+        ShoppingListItem.objects.values_list("user", flat=True)
+    ) == {users[0].pk}
+    kept.refresh_from_db()
+    assert kept.in_carts_count == 1
@@ -1,3 +1,4 @@
+from core.admin_filters import AutocompleteFilterMixin, autocomplete_filter
 from django.contrib import admin
 from django.contrib.auth.models import User
 
@@ -6,14 +7,45 @@ from .models import Follow
 
 class UserAdmin(admin.ModelAdmin):
     """Admin interface for user accounts."""
-    list_display: tuple = ("email", "first_name", "last_name")
-    list_filter: tuple = ("username", "email")
+    list_display: tuple = (
+        "email",
+        "first_name",
+        "last_name",
+        "get_recipes_count",
+        "get_followers_count",
+    )
+    list_select_related: tuple = ("stats",)
+    search_fields: tuple = ("username", "email", "first_name", "last_name")
+    list_filter: tuple = ("is_staff", "is_active")
+    show_full_result_count: bool = False
+
+    @admin.display(description="Рецептов", ordering="stats__recipes_count")
+    def get_recipes_count(self, obj) -> int:
+        """Get count of user's recipes."""
+        stats = getattr(obj, "stats", None)
+        return stats.recipes_count if stats else 0
+
+    @admin.display(
+        description="Подписчиков", ordering="stats__followers_count"
+    )
+    def get_followers_count(self, obj) -> int:
+        """Get count of user's followers."""
+        stats = getattr(obj, "stats", None)
+        return stats.followers_count if stats else 0
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     """Admin interface for user subscriptions."""
     list_display: tuple = ("user", "author")
+    list_select_related: tuple = ("user", "author")
+    search_fields: tuple = ("user__username", "author__username")
+    list_filter: tuple = (
+        autocomplete_filter("user"),
+        autocomplete_filter("author"),
+    )
+    raw_id_fields: tuple = ("user", "author")
+    show_full_result_count: bool = False
     empty_value_display: tuple = "пусто"
 
 
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Greatest
 
 User = get_user_model()
 
@@ -36,3 +37,64 @@ class Follow(models.Model):
     def __str__(self) -> str:
         """Return a string representation of users."""
         return f"{self.user.username} подписан на {self.author.username}"
+
+
+class UserStatsQuerySet(models.QuerySet):
+    """Custom queryset for user counters."""
+    def change(self, user_id: int, **deltas: int) -> None:
+        """Atomically add deltas to counters of the user.
+
+        Missing counters are created by increments only: they are gone
+        when the user is deleted, and the decrements of the recipes and
+        follows deleted by cascade must not create them again.
+        """
+        changes = {
+            field: Greatest(models.F(field) + delta, 0)
+            for field, delta in deltas.items()
+        }
+        if (
+            self.filter(pk=user_id).update(**changes)
+            or max(deltas.values()) <= 0
+        ):
+            return
+        try:
+            with transaction.atomic():
+                self.create(
+                    user_id=user_id,
+                    **{
+                        field: max(delta, 0)
+                        for field, delta in deltas.items()
+                    },
+                )
+        except IntegrityError:
+            self.filter(pk=user_id).update(**changes)
+
+
+class UserStats(models.Model):
+    """Denormalised counters of a user."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Пользователь",
+    )
+    recipes_count: int = models.PositiveIntegerField(
+        verbose_name="Количество рецептов", default=0
+    )
+    followers_count: int = models.PositiveIntegerField(
+        verbose_name="Количество подписчиков", default=0
+    )
+
+    objects = UserStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name: str = "Счётчики пользователя"
+        verbose_name_plural: str = "Счётчики пользователей"
+
+    def __str__(self) -> str:
+        """Return a string representation of user counters."""
+        return (
+            f"{self.user.username}: рецептов {self.recipes_count}, "
+            f"подписчиков {self.followers_count}"
+        )
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Follow, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs) -> None:
+    """Create counters of a new user."""
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Follow)
+def add_follower(sender, instance, created, **kwargs) -> None:
+    """Count a new follower of the author."""
+    if created:
+        UserStats.objects.change(instance.author_id, followers_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follower(sender, instance, **kwargs) -> None:
+    """Stop counting the follower of the author."""
+    UserStats.objects.change(instance.author_id, followers_count=-1)
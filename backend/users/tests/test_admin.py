@@ -0,0 +1,42 @@
+import pytest
+from django.urls import reverse
+from users.models import Follow
+
+ROWS_COUNTS: tuple = (1, 30)
+USER_CHANGELIST_QUERIES: int = 4
+FOLLOW_CHANGELIST_QUERIES: int = 4
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", ROWS_COUNTS)
+def test_user_changelist_queries(
+    admin_client, django_user_model, django_assert_max_num_queries, count
+):
+    """User changelist queries do not grow with the page."""
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f"user{index}", email=f"{index}@mail.ru")
+        for index in range(count)
+    )
+    with django_assert_max_num_queries(USER_CHANGELIST_QUERIES):
+        response = admin_client.get(reverse("admin:auth_user_changelist"))
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", ROWS_COUNTS)
+def test_follow_changelist_queries(
+    admin_client,
+    author,
+    django_user_model,
+    django_assert_max_num_queries,
+    count,
+):
+    """Follow changelist queries do not grow with the page."""
+    for index in range(count):
+        follower = django_user_model.objects.create_user(
+            username=f"follower{index}", email=f"{index}@foodgram.ru"
+        )
+        Follow.objects.create(user=follower, author=author)
+    with django_assert_max_num_queries(FOLLOW_CHANGELIST_QUERIES):
+        response = admin_client.get(reverse("admin:users_follow_changelist"))
+    assert response.status_code == 200
@@ -0,0 +1,22 @@
+import pytest
+from users.models import Follow, UserStats
+
+
+@pytest.mark.django_db(transaction=True)
+def test_delete_user_with_recipes_and_followers(user, author, make_recipes):
+    """Deleting an author does not create its counters again."""
+    make_recipes(author, 1)
+    Follow.objects.create(user=user, author=author)
+    author.delete()
+    assert not UserStats.objects.filter(pk=author.pk).exists()
+    assert UserStats.objects.filter(pk=user.pk).exists()
+
+
+@pytest.mark.django_db
+def test_decrement_does_not_create_counters(user):
+    """Decrements of missing counters are skipped."""
+    UserStats.objects.filter(pk=user.pk).delete()
+    UserStats.objects.change(user.pk, recipes_count=-1)
+    assert not UserStats.objects.filter(pk=user.pk).exists()
+    UserStats.objects.change(user.pk, recipes_count=1)
+    assert UserStats.objects.get(pk=user.pk).recipes_count == 1